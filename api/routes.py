@@ -1,14 +1,21 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import JSONResponse
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Any, Dict, List, Optional
+import asyncio
+import inspect
+import json
 import logging
 from datetime import datetime
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.websockets import WebSocketState
+from pydantic import ConfigDict, ValidationError, create_model
 
 from models.schemas import (
     ChatMessage, ChatResponse, DocumentInfo, DocumentProcessResult,
-    SearchRequest, SearchResult, BusinessInsightRequest, BusinessInsight,
+    SearchRequest, SearchResult, BusinessInsightRequest, BusinessInsight, MultiAnalysisRequest,
     ForecastRequest, ForecastResult, SystemStats, FileInfo,
-    ErrorResponse, SuccessResponse, HealthCheck
+    ErrorResponse, SuccessResponse, HealthCheck, BatchRequest
 )
 from core.chat_engine import ChatEngine
 from core.enhanced_chat_engine import EnhancedChatEngine
@@ -25,6 +32,19 @@ chat_engine = ChatEngine()
 enhanced_chat_engine = EnhancedChatEngine()
 chat_manager = ChatManager()
 
+API_VERSION = "1.0.0"
+
+def _health_response(status: str, components: Dict[str, str]) -> Response:
+    """Build the health check body directly as JSON bytes, bypassing model validation"""
+    body = (
+        b'{"status":' + json.dumps(status).encode()
+        + b',"version":"' + API_VERSION.encode()
+        + b'","timestamp":"' + datetime.now().isoformat().encode()
+        + b'","components":' + json.dumps(components, separators=(",", ":")).encode()
+        + b'}'
+    )
+    return Response(content=body, media_type="application/json")
+
 @router.get("/health", response_model=HealthCheck)
 async def health_check():
     """Health check endpoint"""
@@ -59,17 +79,11 @@ async def health_check():
         elif any(status == "warning" for status in components.values()):
             overall_status = "warning"
         
-        return HealthCheck(
-            status=overall_status,
-            components=components
-        )
+        return _health_response(overall_status, components)
         
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return HealthCheck(
-            status="unhealthy",
-            components={"error": str(e)}
-        )
+        return _health_response("unhealthy", {"error": str(e)})
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage):
@@ -124,16 +138,37 @@ async def list_chats(limit: int = 20):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/chat/{chat_id}")
-async def get_chat(chat_id: str):
-    """Get chat details and history"""
+async def get_chat(chat_id: str, limit: Optional[int] = None, before: Optional[int] = None):
+    """Get chat details and history
+    
+    With `limit`, only the newest `limit` messages before index `before`
+    are returned, along with pagination info for loading older pages.
+    """
     try:
-        chat_data = chat_manager.load_chat(chat_id)
-        if not chat_data:
+        if limit is None:
+            chat_data = chat_manager.load_chat(chat_id)
+            if not chat_data:
+                raise HTTPException(status_code=404, detail="Chat not found")
+            
+            return {
+                "success": True,
+                "chat": chat_data
+            }
+        
+        page = chat_manager.get_message_page(chat_id, limit=limit, before=before)
+        if page is None:
             raise HTTPException(status_code=404, detail="Chat not found")
         
+        chat_data = page['chat']
+        chat_data['messages'] = page['messages']
         return {
             "success": True,
-            "chat": chat_data
+            "chat": chat_data,
+            "pagination": {
+                "start": page['start'],
+                "total": page['total'],
+                "has_more": page['start'] > 0
+            }
         }
     except HTTPException:
         raise
@@ -148,7 +183,9 @@ async def send_message_to_chat(
 ):
     """Send a message in a specific chat session using enhanced engine"""
     try:
-        response = enhanced_chat_engine.chat(
+        # The engine blocks on OpenAI, so run it off the event loop to serve requests concurrently
+        response = await run_in_threadpool(
+            enhanced_chat_engine.chat,
             message=message.message,
             chat_id=chat_id,
             document_id=getattr(message, 'document_id', None)
@@ -158,7 +195,7 @@ async def send_message_to_chat(
             raise HTTPException(status_code=500, detail=response.get('error', 'Chat processing failed'))
         
         # Get suggestions for follow-up questions
-        suggestions = enhanced_chat_engine.get_chat_suggestions(chat_id)
+        suggestions = await run_in_threadpool(enhanced_chat_engine.get_chat_suggestions, chat_id)
         
         return {
             "success": True,
@@ -176,6 +213,65 @@ async def send_message_to_chat(
         logger.error(f"Error sending message to chat {chat_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.websocket("/chat/{chat_id}/ws")
+async def stream_chat(websocket: WebSocket, chat_id: str):
+    """Stream replies for a chat session over a WebSocket
+    
+    Each client frame is a JSON object with "message" and optional
+    "document_id"; the server answers with "token" frames followed by a
+    single "done" (or "error") frame.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                request = await websocket.receive_json()
+                message = request["message"]
+                if not isinstance(message, str):
+                    raise TypeError("message must be a string")
+            except WebSocketDisconnect:
+                raise
+            except (ValueError, KeyError, TypeError) as e:
+                # Malformed frames get an error reply; the socket stays open for the next one
+                if not await _send_ws_event(websocket, _ws_error(chat_id, f"Invalid request: {str(e)}")):
+                    break
+                continue
+            
+            try:
+                # The OpenAI stream is blocking, so iterate it off the event loop
+                events = enhanced_chat_engine.chat_stream(
+                    message=message,
+                    chat_id=chat_id,
+                    document_id=request.get("document_id")
+                )
+                async for event in iterate_in_threadpool(events):
+                    if event['type'] == 'done':
+                        event["suggestions"] = await run_in_threadpool(enhanced_chat_engine.get_chat_suggestions, chat_id)
+                    if not await _send_ws_event(websocket, event):
+                        return
+            except Exception as e:
+                logger.error(f"Error streaming chat {chat_id}: {str(e)}")
+                if not await _send_ws_event(websocket, _ws_error(chat_id, str(e))):
+                    break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        logger.info(f"Chat stream closed for {chat_id}")
+
+def _ws_error(chat_id: str, error: str) -> Dict:
+    """Build an error frame shaped like chat_stream's error events"""
+    return {"type": "error", "success": False, "error": error, "chat_id": chat_id}
+
+async def _send_ws_event(websocket: WebSocket, event: Dict) -> bool:
+    """Send one JSON frame, returning False instead of raising once the client has gone"""
+    if websocket.client_state != WebSocketState.CONNECTED:
+        return False
+    try:
+        await websocket.send_json(event)
+        return True
+    except (WebSocketDisconnect, RuntimeError, OSError):
+        return False
+
 @router.put("/chat/{chat_id}/title")
 async def update_chat_title(chat_id: str, title: str):
     """Update chat title"""
@@ -374,6 +470,36 @@ async def analyze_business_data(request: BusinessInsightRequest):
             detail=f"Error analyzing business data: {str(e)}"
         )
 
+@router.post("/analyze/business/multi")
+async def analyze_business_multi(request: MultiAnalysisRequest):
+    """Run several analysis prompts concurrently, streaming each result as it completes
+    
+    The response body is newline-delimited JSON with one object per prompt:
+    {"key", "success", "response" or "error"}.
+    """
+    async def run_prompt(key: str, prompt: str) -> Dict:
+        try:
+            result = await run_in_threadpool(
+                enhanced_chat_engine.chat,
+                message=prompt,
+                chat_id=request.chat_id,
+                document_id=request.document_id
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        
+        if result.get("success"):
+            return {"key": key, "success": True, "response": result["response"]}
+        logger.error(f"Business analysis '{key}' failed: {result.get('error')}")
+        return {"key": key, "success": False, "error": result.get("error", "Analysis failed")}
+    
+    async def results():
+        tasks = [run_prompt(key, prompt) for key, prompt in request.prompts.items()]
+        for finished in asyncio.as_completed(tasks):
+            yield json.dumps(await finished) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.post("/forecast", response_model=ForecastResult)
 async def generate_forecast(request: ForecastRequest):
     """Generate forecast from time series data"""
@@ -491,6 +617,67 @@ async def delete_document(document_id: str):
             detail=f"Error deleting document: {str(e)}"
         )
 
+# Read-only endpoints that may be combined in a batch request
+BATCH_OPERATIONS = {
+    "chat.list": list_chats,
+    "chat.get": get_chat,
+    "chat.search": search_chats,
+    "chat.suggestions": get_chat_suggestions,
+    "chat.stats": get_chat_stats,
+    "documents.list": list_documents,
+    "stats": get_system_stats
+}
+
+def _params_model(op: str, handler):
+    """Build a model validating batch params against the handler's signature, rejecting unknown names"""
+    fields = {
+        name: (
+            Any if param.annotation is inspect.Parameter.empty else param.annotation,
+            ... if param.default is inspect.Parameter.empty else param.default
+        )
+        for name, param in inspect.signature(handler).parameters.items()
+    }
+    return create_model(f"BatchParams[{op}]", __config__=ConfigDict(extra="forbid"), **fields)
+
+BATCH_PARAMS = {op: _params_model(op, handler) for op, handler in BATCH_OPERATIONS.items()}
+
+@router.post("/batch")
+async def batch(request: BatchRequest):
+    """Run several read operations in one request, computing identical operations once"""
+    results = {}
+    computed = {}
+    
+    for operation in request.operations:
+        key = operation.id or operation.op
+        handler = BATCH_OPERATIONS.get(operation.op)
+        if handler is None:
+            results[key] = {"success": False, "error": f"Unknown operation: {operation.op}"}
+            continue
+        
+        # Operations with the same name and parameters share one result
+        fingerprint = json.dumps([operation.op, operation.params], sort_keys=True, default=str)
+        if fingerprint not in computed:
+            # Each operation fails on its own so one bad entry cannot fail the whole batch
+            try:
+                params = BATCH_PARAMS[operation.op].model_validate(operation.params)
+                data = jsonable_encoder(await handler(**dict(params)))
+                computed[fingerprint] = {"success": True, "data": data}
+            except ValidationError as e:
+                computed[fingerprint] = {"success": False, "error": "Invalid parameters: " + "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                )}
+            except HTTPException as e:
+                computed[fingerprint] = {"success": False, "error": e.detail}
+            except Exception as e:
+                logger.error(f"Error in batch operation {operation.op}: {str(e)}")
+                computed[fingerprint] = {"success": False, "error": str(e)}
+        results[key] = computed[fingerprint]
+    
+    return {
+        "success": True,
+        "results": results
+    }
+
 @router.post("/reset", response_model=SuccessResponse)
 async def reset_system():
     """Reset the entire system (use with caution!)"""
@@ -8,8 +8,13 @@ import sys
 # Your existing imports come after
 import streamlit as st
 import os
-import tempfile
+import io
+import json
+import hashlib
 import shutil
+from collections import deque
+from itertools import islice
+from datetime import datetime
 from pathlib import Path
 
 # Set page config first
@@ -25,8 +30,7 @@ try:
     from core.enhanced_chat_engine import EnhancedChatEngine
     from core.chat_manager import ChatManager
     from core.vector_store import VectorStore
-    from core.document_processor import DocumentProcessor
-    from utils.file_handlers import FileHandler
+    from utils.file_handlers import FileHandler, UPLOAD_INDEX_NAME
     from config.settings import Settings
 except ImportError as e:
     st.error(f"Import error: {e}")
@@ -76,7 +80,6 @@ def initialize_components():
         try:
             chat_manager = ChatManager()
             vector_store = VectorStore()
-            document_processor = DocumentProcessor()
             file_handler = FileHandler()
         except Exception as e:
             st.error(f"Failed to initialize support components: {str(e)}")
@@ -86,7 +89,6 @@ def initialize_components():
             'enhanced_chat_engine': enhanced_chat_engine,
             'chat_manager': chat_manager,
             'vector_store': vector_store,
-            'document_processor': document_processor,
             'file_handler': file_handler
         }
     except Exception as e:
@@ -96,41 +98,245 @@ def initialize_components():
 # Load components
 components = initialize_components()
 
-def upload_and_process_document(uploaded_file, custom_name=None):
-    """Process uploaded document"""
+@st.cache_resource
+def get_document_processor():
+    """Import the document processor (pandas, docx, PyPDF2) only when a page first needs it"""
+    from core.document_processor import DocumentProcessor
+    return DocumentProcessor()
+
+# Copy buffer for streaming uploads to disk
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Maps upload content digests to their processing results
+UPLOAD_INDEX_PATH = Path("uploads") / UPLOAD_INDEX_NAME
+
+# Messages kept in session memory per chat, and how many are drawn (and loaded per older page)
+MAX_SESSION_MESSAGES = 200
+VISIBLE_MESSAGES = 30
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _list_documents(mtime_ns):
+    """List uploaded documents with size and mtime; cached until the uploads directory changes"""
+    documents = []
+    # One scandir pass; DirEntry.stat() reuses the directory read instead of a stat per Path
+    with os.scandir("uploads") as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name != UPLOAD_INDEX_PATH.name:
+                stat = entry.stat()
+                documents.append({
+                    'name': entry.name,
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime
+                })
+    documents.sort(key=lambda doc: doc['name'])
+    return documents
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _count_chats(mtime_ns):
+    """Count every chat session; cached until a chat file is added or removed"""
+    return components['chat_manager'].get_chat_stats().get('total_chats', 0)
+
+def get_uploaded_documents():
+    """Get uploaded documents, re-listing only when the directory mtime changes"""
+    uploads_dir = Path("uploads")
+    if not uploads_dir.exists():
+        return []
+    return _list_documents(uploads_dir.stat().st_mtime_ns)
+
+def count_chats():
+    """Count chat sessions, re-counting only when the chats directory mtime changes"""
+    chats_dir = components['chat_manager'].chats_folder
+    if not chats_dir.exists():
+        return 0
+    return _count_chats(chats_dir.stat().st_mtime_ns)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_business_dataframe(file_bytes, file_name):
+    """Parse an uploaded business file; cached on the file contents so reruns skip re-parsing"""
+    from utils.dataframe_readers import read_csv, read_excel
+    
+    buffer = io.BytesIO(file_bytes)
+    if file_name.lower().endswith('.csv'):
+        return read_csv(buffer)
+    return read_excel(buffer)
+
+def load_older_messages(chat_id, shown):
+    """Prepend the saved page of messages just before the oldest one on screen
+    
+    `shown` is how many of the newest messages are already drawn from the session.
+    """
+    older = st.session_state.older_messages.setdefault(chat_id, {'start': None, 'messages': []})
+    chat_manager = components['chat_manager']
+    if older['start'] is None:
+        # First page: fetch the drawn messages too, in one read, and keep only what precedes them
+        page = chat_manager.get_message_page(chat_id, limit=shown + VISIBLE_MESSAGES)
+        if page is None:
+            return
+        page['messages'] = page['messages'][:max(len(page['messages']) - shown, 0)]
+    else:
+        page = chat_manager.get_message_page(chat_id, limit=VISIBLE_MESSAGES, before=older['start'])
+        if page is None:
+            return
+    older['messages'][:0] = page['messages']
+    older['start'] = page['start']
+
+def upload_digest(uploaded_file):
+    """Hash the uploaded bytes so identical content maps to the same index entry"""
+    digest = hashlib.blake2b(digest_size=16)
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(UPLOAD_BUFFER_SIZE), b""):
+        digest.update(block)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+def load_upload_index():
+    """Load the content-digest index of processed uploads"""
     try:
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-            shutil.copyfileobj(uploaded_file, tmp_file)
-            tmp_path = tmp_file.name
-        
-        # Process document
-        file_name = custom_name or uploaded_file.name
-        
-        # Save to uploads directory
-        upload_path = Path("uploads") / file_name
-        shutil.copy2(tmp_path, upload_path)
-        
-        # Process with document processor
-        processor = components['document_processor']
-        result = processor.process_document(str(upload_path))
-        
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
+        return json.loads(UPLOAD_INDEX_PATH.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_upload_index(index):
+    """Write the upload index via a temporary file so readers never see a partial write"""
+    tmp_path = UPLOAD_INDEX_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(index, indent=2), encoding='utf-8')
+    os.replace(tmp_path, UPLOAD_INDEX_PATH)
+
+def unique_upload_path(file_name):
+    """Pick a path in the uploads directory that no saved file uses yet, like FileHandler.save_uploaded_file"""
+    upload_path = Path("uploads") / file_name
+    counter = 1
+    while upload_path.exists():
+        upload_path = Path("uploads") / f"{Path(file_name).stem}_{counter}{Path(file_name).suffix}"
+        counter += 1
+    return upload_path
+
+def save_and_chunk_document(uploaded_file, upload_index, batch_digests, custom_name=None):
+    """Save an upload to disk and chunk it, unless its content is already indexed
+    
+    batch_digests maps the digests of earlier files in the same batch to their
+    names, so identical files within one batch are processed once.
+    """
+    file_name = custom_name or uploaded_file.name
+    
+    # Skip chunking and embedding entirely for content that was already indexed
+    digest = upload_digest(uploaded_file)
+    if digest in upload_index:
+        if (Path("uploads") / upload_index[digest]['filename']).exists():
+            return {'file_name': file_name, 'digest': digest, 'duplicate': True}
+        # The indexed file has since been deleted, so its content is processed again
+        del upload_index[digest]
+    if digest in batch_digests:
+        return {'file_name': file_name, 'digest': digest, 'duplicate': True, 'duplicate_of': batch_digests[digest]}
+    batch_digests[digest] = file_name
+    
+    # Stream straight into the uploads directory with a 1 MiB buffer,
+    # then atomically move the partial file into place. A file with the same
+    # name (earlier in this batch or from an older upload) gets a suffixed name
+    # instead of being overwritten, and the stored name identifies the document
+    upload_path = unique_upload_path(file_name)
+    stored_name = upload_path.name
+    part_path = upload_path.with_suffix(upload_path.suffix + ".part")
+    uploaded_file.seek(0)
+    with open(part_path, "wb") as out_file:
+        shutil.copyfileobj(uploaded_file, out_file, length=UPLOAD_BUFFER_SIZE)
+    os.replace(part_path, upload_path)
+    
+    # Process with document processor
+    processor = get_document_processor()
+    doc_data = processor.process_document(str(upload_path))
+    chunks = processor.chunk_content(doc_data['content'])
+    
+    upload_timestamp = datetime.now().isoformat()
+    metadatas = [
+        {
+            'document_id': stored_name,
+            'filename': doc_data['filename'],
+            'type': doc_data['type'],
+            'chunk_index': i,
+            'upload_timestamp': upload_timestamp
+        }
+        for i in range(len(chunks))
+    ]
+    
+    return {
+        'file_name': file_name,
+        'stored_name': stored_name,
+        'digest': digest,
+        'chunks': chunks,
+        'metadatas': metadatas
+    }
+
+def _upload_result(prepared, upload_index):
+    """Build the result dict reported for one processed upload"""
+    if 'error' in prepared:
         return {
-            'success': True,
-            'chunks_created': len(result.get('chunks', [])),
-            'document_id': result.get('document_id'),
-            'message': f'Successfully processed {file_name}'
+            'success': False,
+            'error': prepared['error'],
+            'message': f"Failed to process {prepared['file_name']}: {prepared['error']}"
         }
-        
-    except Exception as e:
+    
+    entry = upload_index.get(prepared['digest'])
+    if entry is None:
+        # Duplicate of an earlier file in this batch that failed to process
         return {
             'success': False,
-            'error': str(e),
-            'message': f'Failed to process document: {str(e)}'
+            'error': 'Duplicate of a file that failed to process',
+            'message': f"{prepared['file_name']} duplicates {prepared['duplicate_of']}, which failed to process"
         }
+    
+    result = {
+        'success': True,
+        'chunks_created': entry['chunks_created'],
+        'document_id': entry['document_id'],
+        'message': f"Successfully processed {prepared['file_name']}"
+    }
+    if prepared.get('duplicate'):
+        result['duplicate'] = True
+        result['message'] = f"{prepared['file_name']} was already processed as {entry['filename']}"
+    return result
+
+def upload_and_process_documents(uploaded_files, progress_callback=None):
+    """Process uploads, indexing every new chunk across all files with one batched vector store call"""
+    upload_index = load_upload_index()
+    batch_digests = {}
+    total_steps = len(uploaded_files) + 1
+    
+    prepared_files = []
+    for i, uploaded_file in enumerate(uploaded_files):
+        try:
+            prepared = save_and_chunk_document(uploaded_file, upload_index, batch_digests)
+        except Exception as e:
+            prepared = {'file_name': uploaded_file.name, 'error': str(e)}
+        prepared_files.append(prepared)
+        if progress_callback:
+            progress_callback(i + 1, total_steps)
+    
+    new_files = [prepared for prepared in prepared_files if 'chunks' in prepared]
+    if new_files:
+        try:
+            # Each chunk's metadata already carries its document_id, so files share the embedding batches
+            components['vector_store'].add_documents(
+                texts=[chunk for prepared in new_files for chunk in prepared['chunks']],
+                metadatas=[metadata for prepared in new_files for metadata in prepared['metadatas']]
+            )
+            for prepared in new_files:
+                upload_index[prepared['digest']] = {
+                    'filename': prepared['stored_name'],
+                    'document_id': prepared['stored_name'],
+                    'chunks_created': len(prepared['chunks'])
+                }
+            save_upload_index(upload_index)
+        except Exception as e:
+            for prepared in new_files:
+                prepared['error'] = str(e)
+        
+        _list_documents.clear()
+    
+    if progress_callback:
+        progress_callback(total_steps, total_steps)
+    
+    return [_upload_result(prepared, upload_index) for prepared in prepared_files]
 
 def main():
     """Main application"""
@@ -162,6 +368,8 @@ def enhanced_chat_page():
         st.session_state.current_chat_id = None
     if "chat_messages" not in st.session_state:
         st.session_state.chat_messages = {}
+    if "older_messages" not in st.session_state:
+        st.session_state.older_messages = {}
     
     # Sidebar for chat management
     with st.sidebar:
@@ -172,23 +380,30 @@ def enhanced_chat_page():
             chat_manager = components['chat_manager']
             chat_id = chat_manager.create_new_chat("New Chat")
             st.session_state.current_chat_id = chat_id
-            st.session_state.chat_messages[chat_id] = []
+            st.session_state.chat_messages[chat_id] = deque(maxlen=MAX_SESSION_MESSAGES)
             st.success("Created new chat!")
             st.rerun()
         
         # Document upload
         st.subheader("📤 Upload Documents")
-        uploaded_file = st.file_uploader(
-            "Choose a file",
-            type=['txt', 'pdf', 'docx', 'doc', 'xlsx', 'xls', 'csv', 'md']
+        uploaded_files = st.file_uploader(
+            "Choose files",
+            type=['txt', 'pdf', 'docx', 'doc', 'xlsx', 'xls', 'csv', 'md'],
+            accept_multiple_files=True
         )
         
-        if uploaded_file and st.button("Upload Document"):
-            with st.spinner("Processing document..."):
-                result = upload_and_process_document(uploaded_file)
-                if result['success']:
-                    st.success("Document uploaded successfully!")
-                    st.info(f"Created {result['chunks_created']} text chunks")
+        if uploaded_files and st.button("Upload Documents"):
+            progress_bar = st.progress(0.0)
+            with st.spinner("Processing documents..."):
+                results = upload_and_process_documents(
+                    uploaded_files,
+                    progress_callback=lambda done, total: progress_bar.progress(done / total)
+                )
+            for result in results:
+                if result.get('duplicate'):
+                    st.info(result['message'])
+                elif result['success']:
+                    st.success(f"{result['message']} ({result['chunks_created']} text chunks)")
                 else:
                     st.error(f"Upload failed: {result['message']}")
     
@@ -197,19 +412,37 @@ def enhanced_chat_page():
         st.subheader(f"Current Chat: {st.session_state.current_chat_id[:8]}...")
         
         # Display messages
-        messages = st.session_state.chat_messages.get(st.session_state.current_chat_id, [])
+        messages = st.session_state.chat_messages.setdefault(
+            st.session_state.current_chat_id, deque(maxlen=MAX_SESSION_MESSAGES)
+        )
+        
+        # Draw only the most recent turns; older ones are read from disk a page at a time on request
+        hidden = max(len(messages) - VISIBLE_MESSAGES, 0)
+        shown = len(messages) - hidden
+        older = st.session_state.older_messages.get(st.session_state.current_chat_id)
+        has_older = older['start'] > 0 if older else hidden > 0
+        if has_older and st.button("⬆️ Load older messages"):
+            load_older_messages(st.session_state.current_chat_id, shown)
+            older = st.session_state.older_messages.get(st.session_state.current_chat_id)
+        
+        for message in older['messages'] if older else ():
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
         
-        for message in messages:
+        for message in islice(messages, hidden, None):
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
         
         # Chat input
         if prompt := st.chat_input("Ask me anything..."):
+            # The recent window moves on with this turn, so loaded older pages no longer line up with it
+            st.session_state.older_messages.pop(st.session_state.current_chat_id, None)
+            
             # Add user message
             with st.chat_message("user"):
                 st.markdown(prompt)
             
-            st.session_state.chat_messages[st.session_state.current_chat_id].append({
+            messages.append({
                 "role": "user",
                 "content": prompt
             })
@@ -223,13 +456,12 @@ def enhanced_chat_page():
                             message=prompt,
                             chat_id=st.session_state.current_chat_id
                         )
-                        
                         if response and response.get('success'):
                             ai_response = response['response']
                             st.markdown(ai_response)
                             
                             # Add to chat history
-                            st.session_state.chat_messages[st.session_state.current_chat_id].append({
+                            messages.append({
                                 "role": "assistant",
                                 "content": ai_response
                             })
@@ -254,27 +486,39 @@ def business_analysis_page():
     )
     
     if uploaded_file:
-        if st.button("Analyze Document"):
+        try:
+            df = load_business_dataframe(uploaded_file.getvalue(), uploaded_file.name)
+        except Exception as e:
+            st.error(f"Could not read document: {str(e)}")
+            return
+        
+        # Data preview
+        st.subheader("📋 Data Preview")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Rows", len(df))
+        with col2:
+            st.metric("Columns", df.shape[1])
+        with col3:
+            st.metric("Numeric Columns", len(df.select_dtypes(include=['number']).columns))
+        st.dataframe(df.iloc[:10], use_container_width=True)
+        
+        # Analysis query, answered from the in-memory data without re-uploading or re-embedding
+        query = st.text_input("Ask a question about your business document:")
+        if query and st.button("Get Analysis"):
             with st.spinner("Analyzing..."):
-                result = upload_and_process_document(uploaded_file, f"Business_{uploaded_file.name}")
-                if result['success']:
-                    st.success("Document processed!")
+                try:
+                    summary = get_document_processor().process_dataframe(df, name=uploaded_file.name)
+                    enhanced_chat_engine = components['enhanced_chat_engine']
+                    response = enhanced_chat_engine.chat(
+                        message=f"Analyze this business document: {query}\n\n{summary['content']}"
+                    )
                     
-                    # Simple analysis query
-                    query = st.text_input("Ask a question about your business document:")
-                    if query and st.button("Get Analysis"):
-                        try:
-                            enhanced_chat_engine = components['enhanced_chat_engine']
-                            response = enhanced_chat_engine.chat(
-                                message=f"Analyze this business document: {query}",
-                                document_id=result.get('document_id')
-                            )
-                            
-                            if response and response.get('success'):
-                                st.markdown("### Analysis Results:")
-                                st.markdown(response['response'])
-                        except Exception as e:
-                            st.error(f"Analysis error: {str(e)}")
+                    if response and response.get('success'):
+                        st.markdown("### Analysis Results:")
+                        st.markdown(response['response'])
+                except Exception as e:
+                    st.error(f"Analysis error: {str(e)}")
 
 def system_stats_page():
     """System statistics"""
@@ -282,20 +526,29 @@ def system_stats_page():
     
     try:
         # Basic stats
-        uploads_dir = Path("uploads")
-        chats_dir = Path("chats")
-        
-        num_documents = len(list(uploads_dir.glob("*"))) if uploads_dir.exists() else 0
-        num_chats = len(list(chats_dir.glob("*.json"))) if chats_dir.exists() else 0
+        documents = get_uploaded_documents()
+        num_documents = len(documents)
+        total_size = sum(doc['size'] for doc in documents)
+        num_chats = count_chats()
         
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             st.metric("📄 Documents", num_documents)
         with col2:
-            st.metric("💬 Chat Sessions", num_chats)
+            st.metric("💾 Storage Used", f"{total_size / (1024 * 1024):.1f} MB")
         with col3:
+            st.metric("💬 Chat Sessions", num_chats)
+        with col4:
             st.metric("🤖 AI Engine", "Active")
+        
+        if documents:
+            st.subheader("📁 Recent Documents")
+            # Format timestamps only for the rows actually shown
+            recent = sorted(documents, key=lambda doc: doc['mtime'], reverse=True)[:5]
+            for doc in recent:
+                modified = datetime.fromtimestamp(doc['mtime']).strftime('%Y-%m-%d %H:%M')
+                st.write(f"• {doc['name']} ({doc['size'] / 1024:.1f} KB, {modified})")
             
         st.subheader("💡 Usage Tips")
         st.markdown("""
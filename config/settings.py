@@ -23,16 +23,21 @@ class Settings:
     ALLOWED_EXTENSIONS: set = {
         'txt', 'pdf', 'docx', 'doc', 'xlsx', 'xls', 'csv', 'md'
     }
+    # Parquet copies of parsed business spreadsheets, so restarts skip re-parsing
+    ANALYSIS_CACHE_FOLDER: str = os.getenv("ANALYSIS_CACHE_FOLDER", os.path.join(UPLOAD_FOLDER, ".cache"))
     
     # Server Configuration
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
     STREAMLIT_PORT: int = int(os.getenv("STREAMLIT_PORT", "8501"))
+    # Seconds an idle client connection stays open; outlasts the pause between Streamlit reruns
+    KEEP_ALIVE_TIMEOUT: int = int(os.getenv("KEEP_ALIVE_TIMEOUT", "75"))
     
     # Vector Database Configuration
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
+    VECTOR_BATCH_SIZE: int = int(os.getenv("VECTOR_BATCH_SIZE", "500"))
     
     def __init__(self):
         # Create necessary directories
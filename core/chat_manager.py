@@ -5,21 +5,51 @@ Chat Manager - Enhanced chat functionality with document context and history man
 import os
 import json
 import uuid
+import threading
+from collections import defaultdict
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+def _dump_json(data: Dict[str, Any]) -> bytes:
+    """Serialize chat data to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _dump_line(data: Dict[str, Any]) -> bytes:
+    """Serialize one record as a compact JSON Lines entry"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8') + b"\n"
+
+def _load_json(path: Path) -> Dict[str, Any]:
+    """Read and parse a JSON file"""
+    raw = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 class ChatManager:
     """Manage chat sessions, history, and document context"""
     
     def __init__(self):
         self.chats_folder = Path(settings.UPLOAD_FOLDER).parent / "chats"
         self.chats_folder.mkdir(exist_ok=True)
+        # Serializes log appends and header rewrites when several requests add messages to one chat
+        self._chat_locks = defaultdict(threading.Lock)
+        # Paths of saved chats by chat id, so the save path does not rebuild them on every message
+        self._chat_paths: Dict[str, Path] = {}
         
     def create_new_chat(self, title: str = None) -> str:
         """Create a new chat session"""
@@ -44,29 +74,60 @@ class ChatManager:
         logger.info(f"Created new chat session: {chat_id}")
         return chat_id
     
+    def _chat_file(self, chat_id: str) -> Path:
+        """Get the data file path for a chat"""
+        return self._chat_paths.get(chat_id) or self.chats_folder / f"{chat_id}.json"
+    
     def save_chat(self, chat_id: str, chat_data: Dict[str, Any]) -> bool:
-        """Save chat data to file"""
+        """Save chat data to file, rewriting the full message log"""
         try:
-            chat_file = self.chats_folder / f"{chat_id}.json"
-            chat_data['updated_at'] = datetime.now().isoformat()
+            chat_file = self._chat_file(chat_id)
+            messages = chat_data.get('messages', [])
             
-            with open(chat_file, 'w', encoding='utf-8') as f:
-                json.dump(chat_data, f, indent=2, ensure_ascii=False)
+            self._messages_file(chat_file).write_bytes(b"".join(_dump_line(message) for message in messages))
+            self._write_header(chat_file, chat_data, messages[-1] if messages else None)
+            self._chat_paths[chat_id] = chat_file
             
             return True
         except Exception as e:
             logger.error(f"Error saving chat {chat_id}: {str(e)}")
             return False
     
+    def _write_header(self, chat_file: Path, chat_data: Dict[str, Any],
+                      last_message: Optional[Dict[str, Any]], timestamp: str = None) -> None:
+        """Write the chat record without its messages, plus the listing sidecar
+        
+        `timestamp` reuses an already formatted updated_at.
+        """
+        chat_data['updated_at'] = timestamp or datetime.now().isoformat()
+        header = {key: value for key, value in chat_data.items() if key != 'messages'}
+        
+        chat_file.write_bytes(_dump_json(header))
+        # Keep a small sidecar summary so listings never parse message bodies
+        self._meta_file(chat_file).write_bytes(_dump_json(self._build_summary(header, last_message)))
+    
+    def _read_message_lines(self, chat_file: Path) -> List[bytes]:
+        """Read the raw lines of a chat's append-only message log"""
+        messages_file = self._messages_file(chat_file)
+        if not messages_file.exists():
+            return []
+        
+        with open(messages_file, 'rb') as f:
+            return [line for line in f if line.strip()]
+    
     def load_chat(self, chat_id: str) -> Optional[Dict[str, Any]]:
         """Load chat data from file"""
         try:
-            chat_file = self.chats_folder / f"{chat_id}.json"
+            chat_file = self._chat_file(chat_id)
             if not chat_file.exists():
                 return None
-                
-            with open(chat_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            
+            chat_data = _load_json(chat_file)
+            # Older chats keep their messages inline in the chat file
+            if 'messages' not in chat_data:
+                loads = orjson.loads if orjson is not None else json.loads
+                chat_data['messages'] = [loads(line) for line in self._read_message_lines(chat_file)]
+            return chat_data
         except Exception as e:
             logger.error(f"Error loading chat {chat_id}: {str(e)}")
             return None
@@ -74,34 +135,103 @@ class ChatManager:
     def add_message(self, chat_id: str, role: str, content: str, 
                    document_context: List[str] = None, metadata: Dict = None) -> bool:
         """Add a message to chat history"""
+        return self.add_messages(chat_id, [{
+            'role': role,
+            'content': content,
+            'document_context': document_context,
+            'metadata': metadata
+        }])
+    
+    def add_messages(self, chat_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """Add several messages as one uninterrupted run, e.g. both sides of an exchange
+        
+        Each message is a dict with 'role' and 'content' and optional
+        'document_context' and 'metadata'. The chat lock is held for the whole
+        run, so concurrent exchanges on one chat never interleave. Only the new
+        messages are serialized, appended to the log in one write, and the
+        small header is rewritten once per run.
+        """
         try:
-            chat_data = self.load_chat(chat_id)
-            if not chat_data:
-                return False
-            
-            message = {
-                'id': str(uuid.uuid4()),
-                'role': role,
-                'content': content,
-                'timestamp': datetime.now().isoformat(),
-                'document_context': document_context or [],
-                'metadata': metadata or {}
-            }
+            with self._chat_locks[chat_id]:
+                chat_file = self._chat_file(chat_id)
+                if not chat_file.exists():
+                    return False
+                
+                # Only the small chat header is read; messages are appended to the log
+                chat_data = _load_json(chat_file)
+                if 'messages' in chat_data:
+                    # Move older inline-message chats to the message log first
+                    self.save_chat(chat_id, chat_data)
+                    del chat_data['messages']
+                
+                # One timestamp for the whole run, shared with the chat's updated_at
+                timestamp = datetime.now().isoformat()
+                new_messages = []
+                for message in messages:
+                    document_context = message.get('document_context') or []
+                    new_messages.append({
+                        'id': str(uuid.uuid4()),
+                        'role': message['role'],
+                        'content': message['content'],
+                        'timestamp': timestamp,
+                        'document_context': document_context,
+                        'metadata': message.get('metadata') or {}
+                    })
+                    
+                    # Update context documents if provided
+                    for doc in document_context:
+                        if doc not in chat_data['context_documents']:
+                            chat_data['context_documents'].append(doc)
+                
+                if not new_messages:
+                    return True
+                
+                with open(self._messages_file(chat_file), 'ab') as f:
+                    f.write(b"".join(_dump_line(message) for message in new_messages))
+                chat_data['metadata']['message_count'] += len(new_messages)
+                chat_data['metadata']['document_count'] = len(chat_data['context_documents'])
+                
+                self._write_header(chat_file, chat_data, new_messages[-1], timestamp)
+                self._chat_paths[chat_id] = chat_file
+                return True
+        except Exception as e:
+            logger.error(f"Error adding messages to chat {chat_id}: {str(e)}")
+            return False
+    
+    def get_message_page(self, chat_id: str, limit: int = 30, before: int = None) -> Optional[Dict[str, Any]]:
+        """Get up to `limit` messages ending just before index `before` (default: the newest)
+        
+        Only the requested lines of the message log are parsed. Returns the
+        chat header, the messages with their start index and the total
+        message count, or None if the chat does not exist.
+        """
+        try:
+            chat_file = self._chat_file(chat_id)
+            if not chat_file.exists():
+                return None
             
-            chat_data['messages'].append(message)
-            chat_data['metadata']['message_count'] = len(chat_data['messages'])
+            chat_data = _load_json(chat_file)
+            if 'messages' in chat_data:
+                # Older chats keep their messages inline in the chat file
+                lines = chat_data.pop('messages')
+                parse = lambda message: message
+            else:
+                lines = self._read_message_lines(chat_file)
+                parse = orjson.loads if orjson is not None else json.loads
             
-            # Update context documents if provided
-            if document_context:
-                for doc in document_context:
-                    if doc not in chat_data['context_documents']:
-                        chat_data['context_documents'].append(doc)
-                chat_data['metadata']['document_count'] = len(chat_data['context_documents'])
+            total = len(lines)
+            end = total if before is None else max(0, min(before, total))
+            start = max(end - limit, 0)
             
-            return self.save_chat(chat_id, chat_data)
+            return {
+                'chat': chat_data,
+                'messages': [parse(line) for line in lines[start:end]],
+                'start': start,
+                'total': total
+            }
         except Exception as e:
-            logger.error(f"Error adding message to chat {chat_id}: {str(e)}")
-            return False
+            logger.error(f"Error loading messages for chat {chat_id}: {str(e)}")
+            return None
     
     def get_chat_history(self, chat_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get chat message history"""
@@ -112,25 +242,54 @@ class ChatManager:
         messages = chat_data['messages']
         return messages[-limit:] if limit else messages
     
+    def _chat_files(self) -> List[Path]:
+        """Get all chat data files, excluding summary sidecars"""
+        return [
+            chat_file for chat_file in self.chats_folder.glob("*.json")
+            if not chat_file.name.endswith(".meta.json")
+        ]
+    
+    @staticmethod
+    def _meta_file(chat_file: Path) -> Path:
+        """Get the summary sidecar path for a chat file"""
+        return chat_file.with_suffix(".meta.json")
+    
+    @staticmethod
+    def _messages_file(chat_file: Path) -> Path:
+        """Get the append-only message log path for a chat file"""
+        return chat_file.with_suffix(".messages.jsonl")
+    
+    @staticmethod
+    def _build_summary(chat_data: Dict[str, Any], last_message: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the summary shown in chat listings"""
+        return {
+            'chat_id': chat_data['chat_id'],
+            'title': chat_data['title'],
+            'created_at': chat_data['created_at'],
+            'updated_at': chat_data['updated_at'],
+            'message_count': chat_data['metadata']['message_count'],
+            'document_count': chat_data['metadata']['document_count'],
+            'last_message': last_message['content'][:100] + "..." if last_message else "No messages yet"
+        }
+    
+    def _load_summary(self, chat_file: Path) -> Dict[str, Any]:
+        """Load a chat summary from its sidecar, creating the sidecar for older chats"""
+        meta_file = self._meta_file(chat_file)
+        if meta_file.exists():
+            return _load_json(meta_file)
+        
+        chat_data = self.load_chat(chat_file.stem)
+        summary = self._build_summary(chat_data, chat_data['messages'][-1] if chat_data['messages'] else None)
+        meta_file.write_bytes(_dump_json(summary))
+        return summary
+    
     def list_chats(self, limit: int = 100) -> List[Dict[str, Any]]:
         """List all chat sessions"""
         try:
             chats = []
-            for chat_file in self.chats_folder.glob("*.json"):
+            for chat_file in self._chat_files():
                 try:
-                    with open(chat_file, 'r', encoding='utf-8') as f:
-                        chat_data = json.load(f)
-                        
-                    chat_summary = {
-                        'chat_id': chat_data['chat_id'],
-                        'title': chat_data['title'],
-                        'created_at': chat_data['created_at'],
-                        'updated_at': chat_data['updated_at'],
-                        'message_count': chat_data['metadata']['message_count'],
-                        'document_count': chat_data['metadata']['document_count'],
-                        'last_message': chat_data['messages'][-1]['content'][:100] + "..." if chat_data['messages'] else "No messages yet"
-                    }
-                    chats.append(chat_summary)
+                    chats.append(self._load_summary(chat_file))
                 except Exception as e:
                     logger.error(f"Error reading chat file {chat_file}: {str(e)}")
                     continue
@@ -145,9 +304,12 @@ class ChatManager:
     def delete_chat(self, chat_id: str) -> bool:
         """Delete a chat session"""
         try:
-            chat_file = self.chats_folder / f"{chat_id}.json"
+            chat_file = self._chat_paths.pop(chat_id, None) or self._chat_file(chat_id)
             if chat_file.exists():
                 chat_file.unlink()
+                for sidecar in (self._meta_file(chat_file), self._messages_file(chat_file)):
+                    if sidecar.exists():
+                        sidecar.unlink()
                 logger.info(f"Deleted chat session: {chat_id}")
                 return True
             return False
@@ -176,10 +338,9 @@ class ChatManager:
         """Search chats by content"""
         try:
             results = []
-            for chat_file in self.chats_folder.glob("*.json"):
+            for chat_file in self._chat_files():
                 try:
-                    with open(chat_file, 'r', encoding='utf-8') as f:
-                        chat_data = json.load(f)
+                    chat_data = self.load_chat(chat_file.stem)
                     
                     # Search in title and messages
                     search_text = f"{chat_data['title']} "
@@ -213,14 +374,13 @@ class ChatManager:
             total_messages = 0
             total_documents = 0
             
-            for chat_file in self.chats_folder.glob("*.json"):
+            for chat_file in self._chat_files():
                 try:
-                    with open(chat_file, 'r', encoding='utf-8') as f:
-                        chat_data = json.load(f)
+                    summary = self._load_summary(chat_file)
                     
                     total_chats += 1
-                    total_messages += chat_data['metadata']['message_count']
-                    total_documents += chat_data['metadata']['document_count']
+                    total_messages += summary['message_count']
+                    total_documents += summary['document_count']
                 except Exception:
                     continue
             
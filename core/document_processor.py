@@ -5,6 +5,7 @@ import PyPDF2
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from config.settings import settings
+from utils.dataframe_readers import read_csv, read_excel
 import logging
 
 logger = logging.getLogger(__name__)
@@ -113,7 +114,7 @@ class DocumentProcessor:
         """Extract data from Excel file"""
         try:
             # Read all sheets
-            excel_data = pd.read_excel(file_path, sheet_name=None, engine='openpyxl')
+            excel_data = read_excel(file_path, sheet_name=None)
             
             content_parts = []
             summary = {
@@ -165,7 +166,7 @@ class DocumentProcessor:
     def _process_csv(self, file_path: Path) -> Dict[str, Any]:
         """Extract data from CSV file"""
         try:
-            df = pd.read_csv(file_path)
+            df = read_csv(file_path)
             
             content = f"CSV File: {file_path.name}\n"
             content += f"Columns: {', '.join(df.columns.astype(str))}\n"
@@ -195,6 +196,41 @@ class DocumentProcessor:
             logger.error(f"Error processing CSV file: {str(e)}")
             raise
     
+    def process_dataframe(self, df: pd.DataFrame, name: str = "DataFrame", sample_rows: int = 50) -> Dict[str, Any]:
+        """
+        Summarize an in-memory DataFrame as text without writing it to disk
+        
+        Args:
+            df: DataFrame to summarize
+            name: Display name for the data source
+            sample_rows: Number of leading rows to include as sample data
+            
+        Returns:
+            Dictionary containing the text summary and shape metadata
+        """
+        content = f"Data Source: {name}\n"
+        content += f"Columns: {', '.join(df.columns.astype(str))}\n"
+        content += f"Shape: {df.shape[0]} rows × {df.shape[1]} columns\n\n"
+        
+        # Add sample data
+        content += f"Sample Data (first {sample_rows} rows):\n"
+        content += df.head(sample_rows).to_string(index=False)
+        
+        # Add summary statistics
+        numeric_cols = df.select_dtypes(include=['number']).columns
+        if len(numeric_cols) > 0:
+            content += "\n\nNumeric Summary:\n"
+            content += df[numeric_cols].describe().to_string()
+        
+        return {
+            'content': content,
+            'type': 'dataframe',
+            'rows': df.shape[0],
+            'columns': df.shape[1],
+            'numeric_columns': len(numeric_cols),
+            'filename': name
+        }
+    
     def _process_text(self, file_path: Path) -> Dict[str, Any]:
         """Extract text from plain text file"""
         try:
@@ -5,7 +5,7 @@ Provides document-aware conversations with intelligent context switching
 """
 
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from datetime import datetime
 import openai
 
@@ -151,24 +151,8 @@ If a question cannot be answered from the document context, provide a helpful ge
             Dictionary with response and metadata
         """
         try:
-            # Create new chat if none provided
-            if not chat_id:
-                chat_id = self.chat_manager.create_new_chat()
-            
-            # Get document context if query seems to be asking about documents
-            context_chunks, source_documents = self.get_document_context(
-                query=message, 
-                document_id=document_id
-            )
-            
-            # Get chat history
-            chat_history = self.chat_manager.get_chat_history(chat_id)
-            
-            # Create context-aware prompt
-            messages = self.create_context_aware_prompt(
-                query=message,
-                context_chunks=context_chunks,
-                chat_history=chat_history
+            chat_id, messages, context_chunks, source_documents = self._prepare_chat(
+                message, chat_id, document_id
             )
             
             # Generate response
@@ -181,49 +165,129 @@ If a question cannot be answered from the document context, provide a helpful ge
             
             assistant_message = response.choices[0].message.content
             
-            # Save messages to chat history
-            self.chat_manager.add_message(
-                chat_id=chat_id,
-                role="user",
-                content=message,
-                document_context=source_documents
+            return self._record_exchange(
+                chat_id, message, assistant_message,
+                context_chunks, source_documents, response.usage.total_tokens
             )
             
-            self.chat_manager.add_message(
-                chat_id=chat_id,
-                role="assistant",
-                content=assistant_message,
-                document_context=source_documents,
-                metadata={
-                    'model': settings.OPENAI_MODEL,
-                    'tokens_used': response.usage.total_tokens,
-                    'has_document_context': len(context_chunks) > 0,
-                    'context_documents': len(source_documents)
-                }
+        except Exception as e:
+            logger.error(f"Error in chat processing: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'chat_id': chat_id
+            }
+    
+    def chat_stream(self, message: str, chat_id: str = None, document_id: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a chat response as it is generated
+        
+        Yields {'type': 'token', 'content': ...} events while the model is
+        generating, then one {'type': 'done', ...} event carrying the same
+        fields chat() returns, or {'type': 'error', ...} on failure.
+        """
+        try:
+            chat_id, messages, context_chunks, source_documents = self._prepare_chat(
+                message, chat_id, document_id
             )
             
-            # Determine response type
-            response_type = "document_based" if context_chunks else "general"
+            stream = self.client.chat.completions.create(
+                model=settings.OPENAI_MODEL,
+                messages=messages,
+                max_tokens=settings.MAX_TOKENS,
+                temperature=settings.TEMPERATURE,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
             
-            return {
-                'success': True,
-                'response': assistant_message,
-                'chat_id': chat_id,
-                'response_type': response_type,
-                'context_documents': source_documents,
-                'context_chunks_used': len(context_chunks),
-                'tokens_used': response.usage.total_tokens,
-                'timestamp': datetime.now().isoformat()
-            }
+            parts = []
+            tokens_used = 0
+            for chunk in stream:
+                # The final chunk carries usage and no choices
+                if chunk.usage:
+                    tokens_used = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield {'type': 'token', 'content': chunk.choices[0].delta.content}
+            
+            result = self._record_exchange(
+                chat_id, message, "".join(parts),
+                context_chunks, source_documents, tokens_used
+            )
+            yield {'type': 'done', **result}
             
         except Exception as e:
-            logger.error(f"Error in chat processing: {str(e)}")
-            return {
+            logger.error(f"Error in streaming chat processing: {str(e)}")
+            yield {
+                'type': 'error',
                 'success': False,
                 'error': str(e),
                 'chat_id': chat_id
             }
     
+    def _prepare_chat(self, message: str, chat_id: Optional[str],
+                      document_id: Optional[str]) -> Tuple[str, List[Dict], List[str], List[str]]:
+        """Resolve the chat session and build the context-aware prompt for a message"""
+        # Create new chat if none provided
+        if not chat_id:
+            chat_id = self.chat_manager.create_new_chat()
+        
+        # Get document context if query seems to be asking about documents
+        context_chunks, source_documents = self.get_document_context(
+            query=message, 
+            document_id=document_id
+        )
+        
+        # Get chat history
+        chat_history = self.chat_manager.get_chat_history(chat_id)
+        
+        # Create context-aware prompt
+        messages = self.create_context_aware_prompt(
+            query=message,
+            context_chunks=context_chunks,
+            chat_history=chat_history
+        )
+        
+        return chat_id, messages, context_chunks, source_documents
+    
+    def _record_exchange(self, chat_id: str, message: str, assistant_message: str,
+                         context_chunks: List[str], source_documents: List[str],
+                         tokens_used: int) -> Dict[str, Any]:
+        """Save both sides of an exchange to chat history and build the response dict"""
+        # Saved as one run so concurrent exchanges on the same chat stay paired
+        self.chat_manager.add_messages(chat_id, [
+            {
+                'role': "user",
+                'content': message,
+                'document_context': source_documents
+            },
+            {
+                'role': "assistant",
+                'content': assistant_message,
+                'document_context': source_documents,
+                'metadata': {
+                    'model': settings.OPENAI_MODEL,
+                    'tokens_used': tokens_used,
+                    'has_document_context': len(context_chunks) > 0,
+                    'context_documents': len(source_documents)
+                }
+            }
+        ])
+        
+        # Determine response type
+        response_type = "document_based" if context_chunks else "general"
+        
+        return {
+            'success': True,
+            'response': assistant_message,
+            'chat_id': chat_id,
+            'response_type': response_type,
+            'context_documents': source_documents,
+            'context_chunks_used': len(context_chunks),
+            'tokens_used': tokens_used,
+            'timestamp': datetime.now().isoformat()
+        }
+    
     def get_chat_suggestions(self, chat_id: str) -> List[str]:
         """Get suggested follow-up questions based on chat history and context"""
         try:
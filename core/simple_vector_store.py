@@ -28,6 +28,7 @@ class SimpleVectorStore:
         # Load existing data
         self.documents = self._load_documents()
         self.embeddings = self._load_embeddings()
+        self.chunks_by_document = self._build_document_index()
         
         logger.info("Using Simple Vector Store (file-based)")
     
@@ -41,6 +42,15 @@ class SimpleVectorStore:
                 logger.warning(f"Could not load documents: {e}")
         return {}
     
+    def _build_document_index(self) -> Dict[str, List[str]]:
+        """Map each document_id to its chunk IDs so filtered searches skip other documents"""
+        index = {}
+        for chunk_id, doc_data in self.documents.items():
+            doc_id = doc_data['metadata'].get('document_id')
+            if doc_id:
+                index.setdefault(doc_id, []).append(chunk_id)
+        return index
+    
     def _save_documents(self):
         """Save documents to file"""
         try:
@@ -111,7 +121,7 @@ class SimpleVectorStore:
             
             # Prepare metadata
             if metadatas is None:
-                metadatas = [{}] * len(texts)
+                metadatas = [{} for _ in texts]
             
             # Add document_id to metadata if provided
             if document_id:
@@ -126,6 +136,8 @@ class SimpleVectorStore:
                     'metadata': metadata
                 }
                 self.embeddings[chunk_id] = embedding
+                if metadata.get('document_id'):
+                    self.chunks_by_document.setdefault(metadata['document_id'], []).append(chunk_id)
             
             # Save to files
             self._save_documents()
@@ -151,17 +163,20 @@ class SimpleVectorStore:
             
             query_embedding = query_embeddings[0]
             
-            # Find similar documents
+            # Find similar documents, scanning only the requested document's chunks when filtered
             results = []
+            if document_id:
+                candidates = [
+                    (chunk_id, self.documents[chunk_id])
+                    for chunk_id in self.chunks_by_document.get(document_id, [])
+                ]
+            else:
+                candidates = self.documents.items()
             
-            for chunk_id, doc_data in self.documents.items():
+            for chunk_id, doc_data in candidates:
                 metadata = doc_data['metadata']
                 text = doc_data['text']
                 
-                # Filter by document_id if specified
-                if document_id and metadata.get('document_id') != document_id:
-                    continue
-                
                 # Calculate similarity (simplified - using text matching)
                 query_lower = query.lower()
                 text_lower = text.lower()
@@ -234,12 +249,9 @@ class SimpleVectorStore:
         """Delete all chunks for a specific document"""
         try:
             deleted_count = 0
-            chunk_ids_to_delete = []
             
             # Find chunks to delete
-            for chunk_id, doc_data in self.documents.items():
-                if doc_data['metadata'].get('document_id') == document_id:
-                    chunk_ids_to_delete.append(chunk_id)
+            chunk_ids_to_delete = self.chunks_by_document.pop(document_id, [])
             
             # Delete chunks
             for chunk_id in chunk_ids_to_delete:
@@ -297,6 +309,7 @@ class SimpleVectorStore:
         try:
             self.documents = {}
             self.embeddings = {}
+            self.chunks_by_document = {}
             
             # Delete files
             if self.documents_file.exists():
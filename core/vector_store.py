@@ -102,29 +102,32 @@ class VectorStore:
             if not texts:
                 return []
             
-            # Generate embeddings
-            embeddings = self.get_embeddings(texts)
-            
             # Generate unique IDs for each chunk
             chunk_ids = [str(uuid.uuid4()) for _ in texts]
             
             # Prepare metadata
             if metadatas is None:
-                metadatas = [{}] * len(texts)
+                metadatas = [{} for _ in texts]
             
             # Add document_id to metadata if provided
             if document_id:
-                for metadata in metadatas:
+                for i, metadata in enumerate(metadatas):
                     metadata['document_id'] = document_id
-                    metadata['chunk_index'] = metadatas.index(metadata)
+                    metadata['chunk_index'] = i
             
-            # Add to collection
-            self.collection.add(
-                ids=chunk_ids,
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas
-            )
+            # Embed and insert in bulk slices: one embeddings request and one
+            # collection.add per slice instead of per chunk
+            batch_size = settings.VECTOR_BATCH_SIZE
+            for start in range(0, len(texts), batch_size):
+                end = start + batch_size
+                batch_texts = texts[start:end]
+                
+                self.collection.add(
+                    ids=chunk_ids[start:end],
+                    embeddings=self.get_embeddings(batch_texts),
+                    documents=batch_texts,
+                    metadatas=metadatas[start:end]
+                )
             
             logger.info(f"Added {len(texts)} chunks to ChromaDB")
             return chunk_ids
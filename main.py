@@ -93,5 +93,6 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT,
         log_level="info" if not settings.DEBUG else "debug"
     )
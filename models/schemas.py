@@ -22,28 +22,28 @@ class ChatResponse(BaseModel):
     context_documents: List[str] = Field(default_factory=list, description="Documents used for context")
     suggestions: List[str] = Field(default_factory=list, description="Suggested follow-up questions")
 
-class ChatSession(BaseModel):
-    """Model for chat session information"""
-    chat_id: str = Field(..., description="Unique chat identifier")
+class _ChatBase(BaseModel):
+    """Fields shared by every chat session model"""
+    chat_id: str = Field(..., description="Chat identifier")
     title: str = Field(..., description="Chat title")
+
+class _ChatRecord(_ChatBase):
+    """Chat model carrying creation and update timestamps"""
     created_at: str = Field(..., description="Creation timestamp")
     updated_at: str = Field(..., description="Last update timestamp")
+
+class ChatSession(_ChatRecord):
+    """Model for chat session information"""
     message_count: int = Field(0, description="Number of messages in chat")
     has_documents: bool = Field(False, description="Whether chat references documents")
 
-class ChatHistory(BaseModel):
+class ChatHistory(_ChatRecord):
     """Model for chat history"""
-    chat_id: str = Field(..., description="Chat identifier")
-    title: str = Field(..., description="Chat title")
     messages: List[Dict[str, Any]] = Field(default_factory=list, description="Chat messages")
-    created_at: str = Field(..., description="Creation timestamp")
-    updated_at: str = Field(..., description="Last update timestamp")
     document_references: List[str] = Field(default_factory=list, description="Referenced documents")
 
-class ChatSearchResult(BaseModel):
+class ChatSearchResult(_ChatBase):
     """Model for chat search results"""
-    chat_id: str = Field(..., description="Chat identifier")
-    title: str = Field(..., description="Chat title")
     snippet: str = Field(..., description="Relevant text snippet")
     relevance_score: float = Field(..., description="Search relevance score")
     timestamp: str = Field(..., description="Chat timestamp")
@@ -105,6 +105,12 @@ class BusinessInsight(BaseModel):
     query: Optional[str] = Field(None, description="Original query")
     error: Optional[str] = Field(None, description="Error message if analysis failed")
 
+class MultiAnalysisRequest(BaseModel):
+    """Model for running several business analysis prompts in one request"""
+    prompts: Dict[str, str] = Field(..., min_length=1, max_length=10, description="Prompts keyed by analysis name")
+    document_id: Optional[str] = Field(None, description="Specific document to analyze")
+    chat_id: Optional[str] = Field(None, description="Chat session that records the exchanges")
+
 class ForecastRequest(BaseModel):
     """Model for forecast requests"""
     document_id: str = Field(..., description="Document ID containing time series data")
@@ -112,11 +118,12 @@ class ForecastRequest(BaseModel):
 
 class ForecastResult(BaseModel):
     """Model for forecast results"""
-    forecast_values: List[float] = Field([], description="Forecasted values")
     periods: int = Field(..., description="Number of periods forecasted")
     trend: str = Field(..., description="Overall trend direction")
+    slope: Optional[float] = Field(None, description="Fitted trend slope per period")
     confidence_interval: float = Field(..., description="95% confidence interval")
     r_squared: float = Field(..., description="R-squared value for model fit")
+    forecast_values: List[float] = Field([], description="Forecasted values")
     error: Optional[str] = Field(None, description="Error message if forecasting failed")
 
 class SystemStats(BaseModel):
@@ -174,6 +181,17 @@ class HealthCheck(BaseModel):
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat(), description="Check timestamp")
     components: Dict[str, str] = Field({}, description="Component status")
 
+# Batch request models
+class BatchOperation(BaseModel):
+    """A single read operation inside a batch request"""
+    op: str = Field(..., description="Operation name, e.g. chat.list or documents.list")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Operation parameters")
+    id: Optional[str] = Field(None, description="Key for this result; defaults to the operation name")
+
+class BatchRequest(BaseModel):
+    """Several read operations answered by one request"""
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=20, description="Operations to run")
+
 # Export all models
 __all__ = [
     "ChatMessage",
@@ -185,6 +203,7 @@ __all__ = [
     "SearchResult",
     "BusinessInsightRequest",
     "BusinessInsight",
+    "MultiAnalysisRequest",
     "ForecastRequest",
     "ForecastResult",
     "SystemStats",
@@ -193,5 +212,7 @@ __all__ = [
     "SuccessResponse",
     "ChatEngineConfig",
     "VectorStoreConfig",
-    "HealthCheck"
+    "HealthCheck",
+    "BatchOperation",
+    "BatchRequest"
 ]
@@ -28,11 +28,10 @@ def setup_environment():
             print("❌ .env.example file not found")
             return False
     
-    # Check OpenAI API key
-    from dotenv import load_dotenv
-    load_dotenv()
+    # Parse .env once into a dict instead of loading it into the environment and reading it back
+    from dotenv import dotenv_values, set_key
+    openai_key = os.getenv("OPENAI_API_KEY") or dotenv_values(env_file).get("OPENAI_API_KEY") or ""
     
-    openai_key = os.getenv("OPENAI_API_KEY")
     if not openai_key or openai_key == "your_openai_api_key_here":
         print("\n⚠️  OpenAI API Key Required!")
         print("To use this AI assistant, you need an OpenAI API key.")
@@ -45,23 +44,16 @@ def setup_environment():
         new_key = input("\n🔑 Enter your OpenAI API key: ").strip()
         
         if new_key:
-            # Update .env file
-            with open(".env", "r") as f:
-                content = f.read()
-            
-            content = content.replace(
-                "OPENAI_API_KEY=your_openai_api_key_here",
-                f"OPENAI_API_KEY={new_key}"
-            )
-            
-            with open(".env", "w") as f:
-                f.write(content)
+            # Replace the key's line wherever and however it is written, or append it
+            set_key(env_file, "OPENAI_API_KEY", new_key, quote_mode="never")
+            os.environ["OPENAI_API_KEY"] = new_key
             
             print("✅ OpenAI API key saved to .env file")
         else:
             print("❌ No API key provided. The assistant will not work without it.")
             return False
     else:
+        os.environ["OPENAI_API_KEY"] = openai_key
         print("✅ OpenAI API key found")
     
     # Create necessary directories
@@ -73,24 +65,30 @@ def setup_environment():
 
 def check_dependencies():
     """Check if all required packages are installed"""
-    # Map package names to their import names
-    package_imports = {
-        "fastapi": "fastapi",
-        "uvicorn": "uvicorn", 
-        "openai": "openai",
-        "streamlit": "streamlit",
-        "pandas": "pandas",
-        "numpy": "numpy",
-        "python-dotenv": "dotenv"
+    from importlib.metadata import distributions
+    
+    # Distribution names as published on PyPI
+    required_packages = [
+        "fastapi",
+        "uvicorn",
+        "openai",
+        "streamlit",
+        "pandas",
+        "numpy",
+        "python-dotenv"
+    ]
+    
+    # Read installed distribution metadata once instead of importing each package
+    installed = {
+        dist.metadata["Name"].lower().replace("_", "-")
+        for dist in distributions()
+        if dist.metadata["Name"]
     }
     
-    missing_packages = []
-    
-    for package_name, import_name in package_imports.items():
-        try:
-            __import__(import_name)
-        except ImportError:
-            missing_packages.append(package_name)
+    missing_packages = [
+        package_name for package_name in required_packages
+        if package_name not in installed
+    ]
     
     if missing_packages:
         print(f"❌ Missing packages: {', '.join(missing_packages)}")
@@ -129,17 +127,21 @@ def start_services():
 def start_api_server(background=False):
     """Start the FastAPI server"""
     print("\n🌐 Starting API Server...")
+    # Same keep-alive as main.py, so both launch paths honour KEEP_ALIVE_TIMEOUT
+    from config.settings import settings
+    keep_alive = str(settings.KEEP_ALIVE_TIMEOUT)
     
     if background:
         import subprocess
         import sys
         subprocess.Popen([
             sys.executable, "-m", "uvicorn", "main:app", 
-            "--host", "0.0.0.0", "--port", "8000", "--reload"
+            "--host", "0.0.0.0", "--port", "8000", "--reload",
+            "--timeout-keep-alive", keep_alive
         ])
         print("✅ API Server started in background")
     else:
-        os.system(f"{sys.executable} -m uvicorn main:app --host 0.0.0.0 --port 8000 --reload")
+        os.system(f"{sys.executable} -m uvicorn main:app --host 0.0.0.0 --port 8000 --reload --timeout-keep-alive {keep_alive}")
 
 def start_web_interface():
     """Start the Streamlit web interface"""
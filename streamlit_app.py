@@ -1,13 +1,36 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
 import json
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
+import hashlib
+import html
+import re
 from datetime import datetime
 import os
+import time
+import random
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
+from string import Template
+from streamlit.errors import StreamlitAPIException
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except ImportError:
+    ws_connect = None
+
+try:
+    from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
+except ImportError:
+    MultipartEncoder = MultipartEncoderMonitor = None
+
+try:
+    import bleach
+except ImportError:
+    bleach = None
 
 # Configure page
 st.set_page_config(
@@ -19,93 +42,365 @@ st.set_page_config(
 
 # API base URL
 API_BASE = "https://e6854956fd26.ngrok-free.app/api/v1"
+# Same endpoint over WebSockets (http -> ws, https -> wss)
+WS_BASE = "ws" + API_BASE[len("http"):]
+
+# Messages fetched per page of chat history
+HISTORY_PAGE_SIZE = 30
+# Most recent chats whose first history page is preloaded with the sidebar
+PREFETCH_CHATS = 3
+
+# (connect, read) timeout in seconds; reads allow for slow LLM responses
+REQUEST_TIMEOUT = (5, 120)
+
+# Gateway errors returned while the backend (or its tunnel) restarts
+RETRY_STATUSES = (502, 503, 504)
+# POSTs are not idempotent: a 502/504 may come back while the backend is still working on
+# the request, so only a 503 (the server turned the request away) is safe to send again
+POST_RETRY_STATUSES = (503,)
+
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so API calls reuse pooled keep-alive connections across reruns"""
+    session = requests.Session()
+    # Idempotent methods (GET/PUT/DELETE) retry transient failures; POSTs are left to retry_with_backoff
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http = get_http_session()
+
+def _request_not_sent(error):
+    """Whether a requests ConnectionError happened before the request reached the server"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # Connect failures arrive as a MaxRetryError whose reason is the connection error;
+    # a connection dropped after sending (ProtocolError) has no such reason
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+def retry_with_backoff(func, *args, attempts=4, initial_delay=0.5, max_delay=8.0, **kwargs):
+    """Call a POSTing func, retrying with exponential backoff and jitter only when nothing was processed
+    
+    That is a connection that failed before the request was sent, or a 503
+    from a server that is (re)starting. Read timeouts, dropped connections,
+    502/504 and other HTTP errors are raised immediately, since the backend
+    may already have processed the request.
+    """
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except (requests.ConnectionError, requests.HTTPError) as e:
+            if isinstance(e, requests.HTTPError):
+                if e.response.status_code not in POST_RETRY_STATUSES:
+                    raise
+            elif not _request_not_sent(e):
+                raise
+            if attempt == attempts - 1:
+                raise
+            time.sleep(random.uniform(0, min(max_delay, initial_delay * 2 ** attempt)))
+
+def _post_json(path, payload):
+    """POST JSON to an API path and return the decoded body"""
+    response = http.post(f"{API_BASE}{path}", json=payload, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+# Read endpoints are cached briefly because Streamlit reruns the whole script
+# on every interaction; failures raise so they are never cached
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_get(path, params=None):
+    """GET an API path and return its JSON body"""
+    response = http.get(f"{API_BASE}{path}", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_post(path, payload):
+    """POST a read-only request (such as a batch) and return its JSON body"""
+    return retry_with_backoff(_post_json, path, payload)
+
+@st.cache_data(ttl=5, show_spinner=False)
+def cached_chat_history(chat_id, limit=None, before=None):
+    """GET a chat's history; kept only briefly since it changes with every message"""
+    params = {"limit": limit, "before": before} if limit else None
+    response = http.get(f"{API_BASE}/chat/{chat_id}", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def invalidate_api_cache():
+    """Drop cached API reads after a mutation so the next rerun sees fresh data"""
+    cached_get.clear()
+    cached_post.clear()
+    cached_chat_history.clear()
 
+def _patch_chat_list(update):
+    """Apply a chat mutation to the sidebar's chat list locally instead of refetching it"""
+    # Chat searches and /chat/list reads would otherwise show the old list
+    cached_get.clear()
+    chats = st.session_state.get("chat_list")
+    if chats is not None:
+        st.session_state.chat_list = update(chats)
+
+@st.cache_data(show_spinner=False)
+def _doc_options(docs_tuple):
+    """Map selectbox labels to document ids for (filename, type, document_id) tuples"""
+    return {"None": None, **{f"{filename} ({doc_type})": document_id for filename, doc_type, document_id in docs_tuple}}
+
+# Probed at most every 10 seconds instead of on every rerun
+@st.cache_data(ttl=10, show_spinner=False)
 def check_api_health():
     """Check if API is running"""
     try:
-        response = requests.get(f"{API_BASE}/health", timeout=5)
+        response = http.get(f"{API_BASE}/health", timeout=2)
         return response.status_code == 200
     except:
         return False
 
-def send_chat_message(message, conversation_id=None, include_context=True):
-    """Send a message to the chat API"""
-    try:
-        payload = {
-            "message": message,
-            "conversation_id": conversation_id,
-            "include_context": include_context
-        }
-        response = requests.post(f"{API_BASE}/chat", json=payload)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        st.error(f"Error sending message: {str(e)}")
-        return None
-
 # Enhanced Chat Management Functions
 def create_new_chat(title=None):
     """Create a new chat session"""
     try:
         payload = {"title": title} if title else {}
-        response = requests.post(f"{API_BASE}/chat/new", json=payload)
+        response = http.post(f"{API_BASE}/chat/new", json=payload, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        result = response.json()
+        if result.get("success"):
+            new_chat = {
+                "chat_id": result["chat_id"],
+                "title": result["title"],
+                "message_count": 0,
+                "created_at": datetime.now().isoformat()
+            }
+            _patch_chat_list(lambda chats: [new_chat] + chats)
+        return result
     except Exception as e:
         st.error(f"Error creating new chat: {str(e)}")
         return None
 
-def get_chat_list(limit=20):
-    """Get list of chat sessions"""
+def get_chat_history(chat_id, limit=HISTORY_PAGE_SIZE, before=None):
+    """Get a page of chat history: the newest `limit` messages before index `before`"""
     try:
-        response = requests.get(f"{API_BASE}/chat/list", params={"limit": limit})
-        response.raise_for_status()
-        return response.json()
+        return cached_chat_history(chat_id, limit, before)
     except Exception as e:
-        st.error(f"Error getting chat list: {str(e)}")
+        st.error(f"Error getting chat history: {str(e)}")
         return None
 
-def get_chat_history(chat_id):
-    """Get chat history for a specific chat"""
+def _store_recent_page(chat_id, chat_history):
+    """Cache a chat's newest history page in the session, remembering where older pages start"""
+    st.session_state.chat_messages[chat_id] = chat_history["chat"]["messages"]
+    st.session_state.history_start[chat_id] = chat_history.get("pagination", {}).get("start", 0)
+
+def load_recent_messages(chat_id):
+    """Load the newest page of a chat into the session cache"""
+    chat_history = get_chat_history(chat_id)
+    if chat_history and chat_history.get("success"):
+        _store_recent_page(chat_id, chat_history)
+    else:
+        st.session_state.chat_messages[chat_id] = []
+        st.session_state.history_start[chat_id] = 0
+
+def prefetch_chat_histories(chat_ids):
+    """Load the newest page of several uncached chats with one batch request
+    
+    Only free cache slots are filled, so prefetching never evicts a chat
+    the user has already opened. Each chat is tried once per session, so a
+    chat that fails to load is not requested again on every rerun; clicking
+    it still loads it directly.
+    """
+    cache = st.session_state.chat_messages
+    attempted = st.session_state.setdefault("prefetch_attempted", set())
+    free_slots = cache.max_chats - len(cache)
+    missing = [
+        chat_id for chat_id in chat_ids
+        if chat_id not in cache and chat_id not in attempted
+    ][:free_slots]
+    if not missing:
+        return
+    attempted.update(missing)
+    
+    results = run_batch([
+        {"op": "chat.get", "params": {"chat_id": chat_id, "limit": HISTORY_PAGE_SIZE}, "id": chat_id}
+        for chat_id in missing
+    ])
+    for chat_id in missing:
+        result = results.get(chat_id) or {}
+        if result.get("success"):
+            _store_recent_page(chat_id, result["data"])
+
+def load_older_messages(chat_id):
+    """Prepend the previous page of history to a cached chat"""
+    start = st.session_state.history_start.get(chat_id, 0)
+    chat_history = get_chat_history(chat_id, before=start)
+    if chat_history and chat_history.get("success"):
+        st.session_state.chat_messages[chat_id] = (
+            chat_history["chat"]["messages"] + st.session_state.chat_messages[chat_id]
+        )
+        st.session_state.history_start[chat_id] = chat_history.get("pagination", {}).get("start", 0)
+
+def resolve_chat_id(chat_id):
+    """Map the special business analysis session name to its real chat ID"""
+    # Handle special business analysis session
+    if chat_id == "business_analysis_session":
+        # Create or get existing business analysis session
+        if "business_session_id" not in st.session_state:
+            result = create_new_chat("Business Analysis Session")
+            if result and result.get("success"):
+                st.session_state.business_session_id = result["chat_id"]
+            else:
+                st.error("Failed to create business analysis session")
+                return None
+        chat_id = st.session_state.business_session_id
+    return chat_id
+
+def post_chat_message(chat_id, message, document_id=None):
+    """POST a message to a chat session; raises on failure and touches no Streamlit state"""
+    payload = {
+        "message": message,
+        "document_id": document_id
+    }
+    result = retry_with_backoff(_post_json, f"/chat/{chat_id}/message", payload)
+    invalidate_api_cache()
+    return result
+
+def send_message_to_chat(chat_id, message, document_id=None):
+    """Send a message to a specific chat session"""
     try:
-        response = requests.get(f"{API_BASE}/chat/{chat_id}")
-        response.raise_for_status()
-        return response.json()
+        chat_id = resolve_chat_id(chat_id)
+        if chat_id is None:
+            return None
+        return post_chat_message(chat_id, message, document_id)
     except Exception as e:
-        st.error(f"Error getting chat history: {str(e)}")
+        st.error(f"Error sending message to chat: {str(e)}")
         return None
 
-def send_message_to_chat(chat_id, message, document_id=None):
-    """Send a message to a specific chat session"""
+def run_business_batch(document_id, prompts, chat_id="business_analysis_session"):
+    """Run several analysis prompts in one request; returns {key: response text or None}"""
+    chat_id = resolve_chat_id(chat_id)
+    if chat_id is None:
+        return {}
+    
+    payload = {
+        "prompts": prompts,
+        "document_id": document_id,
+        "chat_id": chat_id
+    }
+    responses = dict.fromkeys(prompts)
     try:
-        # Handle special business analysis session
-        if chat_id == "business_analysis_session":
-            # Create or get existing business analysis session
-            if "business_session_id" not in st.session_state:
-                result = create_new_chat("Business Analysis Session")
-                if result and result.get("success"):
-                    st.session_state.business_session_id = result["chat_id"]
+        # The server streams one JSON line per prompt as each analysis finishes
+        with http.post(f"{API_BASE}/analyze/business/multi", json=payload,
+                       timeout=REQUEST_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                result = json.loads(line)
+                if result.get("success"):
+                    responses[result["key"]] = result["response"]
                 else:
-                    st.error("Failed to create business analysis session")
-                    return None
-            chat_id = st.session_state.business_session_id
-        
-        payload = {
-            "message": message,
-            "document_id": document_id
-        }
-        response = requests.post(f"{API_BASE}/chat/{chat_id}/message", json=payload)
-        response.raise_for_status()
-        return response.json()
+                    st.error(f"Error running {result['key']} analysis: {result.get('error')}")
     except Exception as e:
-        st.error(f"Error sending message to chat: {str(e)}")
+        st.error(f"Error running analyses: {str(e)}")
+    finally:
+        invalidate_api_cache()
+    return responses
+
+def split_report_and_insights(text):
+    """Split a {"report", "insights"} JSON reply; falls back to (text, None) for plain replies"""
+    payload = text.strip()
+    # Models often wrap JSON in a markdown code fence
+    if payload.startswith("```"):
+        payload = payload.strip("`").strip()
+        if payload.startswith("json"):
+            payload = payload[len("json"):]
+    try:
+        result = json.loads(payload)
+    except ValueError:
+        return text, None
+    if not isinstance(result, dict) or "report" not in result:
+        return text, None
+    return result["report"], result.get("insights")
+
+def stream_message_to_chat(chat_id, message, document_id=None, result=None):
+    """Yield reply text as it streams from the chat WebSocket
+    
+    The final response fields (same shape as send_message_to_chat) are
+    stored in ``result["response"]``. Falls back to a single HTTP request
+    when the websockets package is missing or the socket cannot connect.
+    """
+    result = result if result is not None else {}
+    
+    if ws_connect is not None:
+        streamed = False
+        try:
+            with ws_connect(f"{WS_BASE}/chat/{chat_id}/ws") as websocket:
+                websocket.send(json.dumps({"message": message, "document_id": document_id}))
+                for frame in websocket:
+                    event = json.loads(frame)
+                    if event["type"] == "token":
+                        streamed = True
+                        yield event["content"]
+                        continue
+                    
+                    if event["type"] == "error":
+                        st.error(f"Error sending message to chat: {event.get('error')}")
+                    else:
+                        invalidate_api_cache()
+                    result["response"] = event
+                    return
+        except Exception as e:
+            # Once tokens have been shown, retrying over HTTP would duplicate the reply
+            if streamed:
+                st.error(f"Error streaming response: {str(e)}")
+                return
+    
+    response = send_message_to_chat(chat_id, message, document_id)
+    result["response"] = response
+    if response and response.get("success"):
+        yield response["response"]
+
+def stream_business_reply(chat_id, message, document_id=None):
+    """Render a business prompt's reply as it streams and return its text
+    
+    Every call is sent to the server, so the turn is always saved to chat
+    history. The reply is also kept for the session, where
+    stored_business_reply can show it again on later reruns.
+    """
+    chat_id = resolve_chat_id(chat_id)
+    if chat_id is None:
         return None
+    
+    replies = st.session_state.setdefault("streamed_replies", {})
+    key = (message, document_id)
+    
+    result = {}
+    st.write_stream(stream_message_to_chat(chat_id, message, document_id, result))
+    response = result.get("response")
+    if not (response and response.get("success")):
+        return None
+    replies[key] = response["response"]
+    return replies[key]
+
+def stored_business_reply(message, document_id=None):
+    """The session's last streamed reply to a business prompt, if any"""
+    return st.session_state.get("streamed_replies", {}).get((message, document_id))
 
 def update_chat_title(chat_id, title):
     """Update chat title"""
     try:
-        response = requests.put(f"{API_BASE}/chat/{chat_id}/title", params={"title": title})
+        response = http.put(f"{API_BASE}/chat/{chat_id}/title", params={"title": title}, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
+        _patch_chat_list(lambda chats: [
+            dict(chat, title=title) if chat.get("chat_id") == chat_id else chat
+            for chat in chats
+        ])
         return response.json()
     except Exception as e:
         st.error(f"Error updating chat title: {str(e)}")
@@ -114,41 +409,45 @@ def update_chat_title(chat_id, title):
 def delete_chat(chat_id):
     """Delete a chat session"""
     try:
-        response = requests.delete(f"{API_BASE}/chat/{chat_id}")
+        response = http.delete(f"{API_BASE}/chat/{chat_id}", timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
+        st.session_state.chat_messages.pop(chat_id, None)
+        _patch_chat_list(lambda chats: [chat for chat in chats if chat.get("chat_id") != chat_id])
         return response.json()
     except Exception as e:
         st.error(f"Error deleting chat: {str(e)}")
         return None
 
-def search_chats(query, limit=10):
-    """Search chats by content"""
-    try:
-        response = requests.get(f"{API_BASE}/chats/search", params={"query": query, "limit": limit})
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        st.error(f"Error searching chats: {str(e)}")
-        return None
-
-def get_chat_suggestions(chat_id):
-    """Get chat suggestions"""
-    try:
-        response = requests.get(f"{API_BASE}/chat/{chat_id}/suggestions")
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        st.error(f"Error getting chat suggestions: {str(e)}")
-        return None
-
-def upload_document(file, custom_name=None):
-    """Upload a document to the API"""
+def upload_document(file, custom_name=None, progress_callback=None):
+    """Upload a document to the API
+    
+    With requests-toolbelt installed the multipart body is streamed from the
+    file in chunks instead of being built in memory, and progress_callback
+    (if given) receives the fraction of bytes sent.
+    """
     try:
-        files = {"file": (file.name, file, file.type)}
-        data = {"custom_name": custom_name} if custom_name else {}
-        
-        response = requests.post(f"{API_BASE}/upload", files=files, data=data)
+        file.seek(0)
+        if MultipartEncoder is not None:
+            fields = {"file": (file.name, file, file.type)}
+            if custom_name:
+                fields["custom_name"] = custom_name
+            body = MultipartEncoder(fields=fields)
+            if progress_callback:
+                body = MultipartEncoderMonitor(
+                    body, lambda monitor: progress_callback(min(monitor.bytes_read / monitor.len, 1.0))
+                )
+            response = http.post(
+                f"{API_BASE}/upload",
+                data=body,
+                headers={"Content-Type": body.content_type},
+                timeout=REQUEST_TIMEOUT
+            )
+        else:
+            files = {"file": (file.name, file, file.type)}
+            data = {"custom_name": custom_name} if custom_name else {}
+            response = http.post(f"{API_BASE}/upload", files=files, data=data, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
+        invalidate_api_cache()
         return response.json()
     except Exception as e:
         st.error(f"Error uploading file: {str(e)}")
@@ -157,35 +456,17 @@ def upload_document(file, custom_name=None):
 def get_documents():
     """Get list of uploaded documents"""
     try:
-        response = requests.get(f"{API_BASE}/documents")
-        response.raise_for_status()
-        return response.json()
+        return cached_get("/documents")
     except Exception as e:
         st.error(f"Error retrieving documents: {str(e)}")
         return []
 
-def search_documents(query, document_id=None, limit=10):
-    """Search within documents"""
-    try:
-        payload = {
-            "query": query,
-            "document_id": document_id,
-            "limit": limit
-        }
-        response = requests.post(f"{API_BASE}/search", json=payload)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        st.error(f"Error searching documents: {str(e)}")
-        return None
-
 def get_business_insights(query=None):
     """Get business insights"""
     try:
         payload = {"query": query} if query else {}
-        response = requests.post(f"{API_BASE}/analyze/business", json=payload)
-        response.raise_for_status()
-        return response.json()
+        # Insights don't touch chat history, so asking the same question again reuses the answer
+        return cached_post("/analyze/business", payload)
     except Exception as e:
         st.error(f"Error getting business insights: {str(e)}")
         return None
@@ -193,13 +474,346 @@ def get_business_insights(query=None):
 def get_system_stats():
     """Get system statistics"""
     try:
-        response = requests.get(f"{API_BASE}/stats")
-        response.raise_for_status()
-        return response.json()
+        return cached_get("/stats")
     except Exception as e:
         st.error(f"Error getting system stats: {str(e)}")
         return None
 
+def run_batch(operations):
+    """Run several read operations with one request to the batch endpoint"""
+    try:
+        return cached_post("/batch", {"operations": operations}).get("results", {})
+    except Exception as e:
+        st.error(f"Error running batch request: {str(e)}")
+        return {}
+
+def fetch_sidebar_data(search_query=None):
+    """Fetch the chat list, documents and optional chat search in a single round trip"""
+    operations = [
+        {"op": "chat.list", "params": {"limit": 50}},
+        {"op": "documents.list"}
+    ]
+    if search_query:
+        operations.append({"op": "chat.search", "params": {"query": search_query}})
+    
+    results = run_batch(operations)
+    
+    def data(op):
+        result = results.get(op) or {}
+        if not result.get("success"):
+            if result.get("error"):
+                st.error(f"Error loading {op}: {result['error']}")
+            return None
+        return result["data"]
+    
+    return (
+        data("chat.list"),
+        data("documents.list") or [],
+        data("chat.search") if search_query else None
+    )
+
+# Chat histories kept in session memory; older ones are refetched when reopened
+MAX_CACHED_CHATS = 10
+
+class ChatMessageCache(OrderedDict):
+    """Per-session chat histories that keep only the most recently used chats"""
+    
+    def __init__(self, max_chats=MAX_CACHED_CHATS):
+        self.max_chats = max_chats
+        super().__init__()
+    
+    def __getitem__(self, chat_id):
+        messages = super().__getitem__(chat_id)
+        self.move_to_end(chat_id)
+        return messages
+    
+    def __setitem__(self, chat_id, messages):
+        super().__setitem__(chat_id, messages)
+        self.move_to_end(chat_id)
+        while len(self) > self.max_chats:
+            self.popitem(last=False)
+
+# Quick analyses offered on the business dashboard, keyed by their results slot
+QUICK_ANALYSES = {
+    'revenue': {
+        'label': "📈 Revenue Analysis",
+        'button_key': "quick_revenue",
+        'spinner': "Analyzing revenue data...",
+        'prompt': "Provide a comprehensive revenue analysis including trends, growth rates, seasonal patterns, and key revenue drivers. Include specific numbers and percentages where available."
+    },
+    'costs': {
+        'label': "💰 Cost Analysis",
+        'button_key': "quick_cost",
+        'spinner': "Analyzing cost structure...",
+        'prompt': "Analyze all costs and expenses, categorize them, identify cost drivers, and suggest optimization opportunities. Include cost ratios and trends."
+    },
+    'kpis': {
+        'label': "🎯 KPI Dashboard",
+        'button_key': "quick_kpi",
+        'spinner': "Calculating KPIs...",
+        'prompt': "Calculate and present key performance indicators (KPIs) including profitability ratios, efficiency metrics, growth rates, and benchmark comparisons. Format as a dashboard."
+    }
+}
+
+# Query suggestions for each Advanced Analysis category
+QUERY_SUGGESTIONS = {
+    "📈 Financial Performance": [
+        "What are the key financial performance indicators?",
+        "How has profitability changed over time?",
+        "What are the main revenue streams and their performance?",
+        "Calculate financial ratios and their implications"
+    ],
+    "📊 Operational Metrics": [
+        "What are the operational efficiency metrics?",
+        "Identify bottlenecks and improvement opportunities",
+        "Analyze productivity trends and patterns",
+        "Compare operational costs across periods"
+    ],
+    "💰 Profitability Analysis": [
+        "Break down profit margins by product/service",
+        "Identify most and least profitable segments",
+        "Analyze cost structure and optimization opportunities",
+        "Calculate return on investment metrics"
+    ],
+    "📉 Risk Assessment": [
+        "Identify financial and operational risks",
+        "Assess cash flow volatility and stability",
+        "Analyze dependency on key customers/suppliers",
+        "Evaluate market and competitive risks"
+    ],
+    "🎪 Market Analysis": [
+        "Analyze market share and competitive position",
+        "Identify market trends and opportunities",
+        "Assess customer segmentation and behavior",
+        "Evaluate pricing strategy effectiveness"
+    ],
+    "🔮 Forecasting & Trends": [
+        "Generate revenue and expense forecasts",
+        "Identify seasonal patterns and trends",
+        "Predict future performance based on historical data",
+        "Scenario analysis for different market conditions"
+    ],
+    "⚖️ Comparative Analysis": [
+        "Compare performance across time periods",
+        "Benchmark against industry standards",
+        "Analyze variance from budget/targets",
+        "Compare different business units/products"
+    ]
+}
+
+# Reports tab buttons, grouped by column; keys double as the button keys
+REPORT_GROUPS = {
+    "📈 Financial Reports": {
+        "income_statement": {
+            'label': "💰 Income Statement",
+            'title': "Income Statement",
+            'prompt': "Generate a detailed Income Statement (Profit & Loss) report with revenues, expenses, and net income calculations. Format as a professional financial statement."
+        },
+        "balance_sheet": {
+            'label': "💎 Balance Sheet Analysis",
+            'title': "Balance Sheet Analysis",
+            'prompt': "Analyze the balance sheet data including assets, liabilities, and equity. Calculate key ratios and provide insights on financial position."
+        },
+        "cash_flow": {
+            'label': "💸 Cash Flow Report",
+            'title': "Cash Flow Report",
+            'prompt': "Generate a comprehensive cash flow analysis including operating, investing, and financing activities. Identify cash flow trends and liquidity position."
+        }
+    },
+    "📊 Operational Reports": {
+        "performance_dashboard": {
+            'label': "📈 Performance Dashboard",
+            'title': "Performance Dashboard",
+            'prompt': "Create a comprehensive performance dashboard with KPIs, metrics, trends, and performance indicators. Include visual elements and key insights."
+        },
+        "executive_summary": {
+            'label': "🎯 Executive Summary",
+            'title': "Executive Summary",
+            'prompt': "Create an executive summary highlighting key financial performance, major insights, trends, risks, and strategic recommendations for leadership review."
+        },
+        "risk_assessment": {
+            'label': "⚠️ Risk Assessment Report",
+            'title': "Risk Assessment",
+            'prompt': "Conduct a comprehensive risk assessment including financial risks, operational risks, market risks, and mitigation strategies."
+        }
+    }
+}
+
+_BUSINESS_CSS = """
+<style>
+.metric-card {
+    background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+    padding: 1rem;
+    border-radius: 10px;
+    color: white;
+    margin: 0.5rem 0;
+}
+.analysis-card {
+    background: #f8f9fa;
+    padding: 1.5rem;
+    border-radius: 10px;
+    border-left: 4px solid #007bff;
+    margin: 1rem 0;
+}
+.insight-box {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    padding: 1rem;
+    border-radius: 8px;
+    color: white;
+    margin: 0.5rem 0;
+}
+</style>
+"""
+
+# Result cards; $heading is an <h4> element or empty
+_ANALYSIS_CARD = Template("""
+<div class="analysis-card">
+    $heading
+    $content
+</div>
+""")
+
+_INSIGHT_BOX = Template("""
+<div class="insight-box">
+    $heading
+    $content
+</div>
+""")
+
+# Markup LLM replies may keep inside the raw HTML cards; anything else is stripped
+_ALLOWED_TAGS = frozenset({
+    "b", "i", "em", "strong", "h4", "p", "ul", "ol", "li", "br",
+    "div", "table", "tr", "td", "th", "code"
+})
+
+@lru_cache(maxsize=256)
+def _clean(text):
+    """Sanitize reply text once before it is rendered with unsafe_allow_html"""
+    if bleach is None:
+        return html.escape(text)
+    return bleach.clean(text, tags=_ALLOWED_TAGS, strip=True)
+
+def render_card(template, content, heading=""):
+    """Render a reply inside one of the HTML card templates"""
+    st.markdown(template.substitute(heading=heading, content=_clean(str(content))), unsafe_allow_html=True)
+
+_SELECTED_DOC_CARD = Template("""
+<div class="metric-card">
+    <h4>📋 Currently Selected</h4>
+    <p><strong>$name</strong></p>
+    <p>Type: $type | Chunks: $chunks</p>
+</div>
+""")
+
+def _build_trend_df(months, revenue, expenses):
+    """Build a Month/Revenue/Expenses frame from parallel column sequences
+    
+    Callers pass whole columns rather than a list of row dicts, so pandas
+    builds each column in one step instead of looping over rows.
+    """
+    import pandas as pd
+    
+    return pd.DataFrame.from_dict({
+        'Month': months,
+        'Revenue': revenue,
+        'Expenses': expenses
+    })
+
+def _plot_safe(df):
+    """Narrow numeric columns to float32 before charting; plots don't need 64-bit precision"""
+    numeric_columns = df.select_dtypes("number").columns
+    return df.astype({column: "float32" for column in numeric_columns})
+
+# cache_data hands each session its own copy, so a caller tweaking the figure
+# cannot leak into another user's chart the way a shared cache_resource would
+@st.cache_data(show_spinner=False)
+def build_sample_dashboard_figure():
+    """Build the sample revenue vs expenses chart once and reuse it across reruns"""
+    import plotly.graph_objects as go
+    
+    sample_data = _plot_safe(_build_trend_df(
+        ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
+        [20000, 25000, 22000, 28000, 32000, 35000],
+        [15000, 18000, 16000, 20000, 22000, 24000]
+    ))
+    
+    # WebGL traces keep the chart responsive once trends grow to thousands of points
+    fig = go.Figure()
+    for column, color in (('Revenue', '#1f77b4'), ('Expenses', '#ff7f0e')):
+        fig.add_trace(go.Scattergl(
+            x=sample_data['Month'], y=sample_data[column],
+            mode='lines', name=column, line=dict(color=color)
+        ))
+    fig.update_layout(title="📈 Sample Revenue vs Expenses Trend")
+    return fig
+
+def suggestion_key(suggestion):
+    """Widget key derived from the suggestion text so a button keeps its identity when the list changes"""
+    return f"sugg_{hashlib.blake2b(suggestion.encode('utf-8'), digest_size=8).hexdigest()}"
+
+def fragment(func):
+    """Run func as a Streamlit fragment when the installed version supports it"""
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return decorator(func) if decorator else func
+
+def row_menu(label):
+    """Popover for per-row actions where supported, otherwise a collapsed expander"""
+    if hasattr(st, "popover"):
+        return st.popover(label)
+    return st.expander(label)
+
+def rerun_fragment():
+    """Rerun only the enclosing fragment where supported, otherwise the whole app"""
+    try:
+        st.rerun(scope="fragment")
+    except (TypeError, StreamlitAPIException):
+        st.rerun()
+
+def _context_captions(context_docs, response_type):
+    """Format the used-documents and response-type captions for an assistant reply"""
+    captions = []
+    # context_documents may arrive as a list or, from older chats, a plain string
+    if isinstance(context_docs, list):
+        context_docs = ", ".join(context_docs)
+    if context_docs:
+        captions.append(f"📄 Used documents: {context_docs}")
+    if response_type != "general":
+        captions.append(f"🏷️ Response type: {response_type}")
+    return captions
+
+def _render_context_caption(metadata):
+    """Show an assistant reply's captions, formatting them once per message"""
+    if "captions" not in metadata:
+        metadata["captions"] = _context_captions(
+            metadata.get("context_documents", []),
+            metadata.get("response_type", "general")
+        )
+    for caption in metadata["captions"]:
+        st.caption(caption)
+
+def render_chat_message(message):
+    """Render one chat message with its document and response-type captions"""
+    role = message.get("role", "user")
+    content = message.get("content", "")
+    
+    with st.chat_message(role):
+        st.markdown(content)
+        
+        # Show metadata for assistant messages
+        if role == "assistant" and "metadata" in message:
+            _render_context_caption(message["metadata"])
+
+@fragment
+def render_suggestions(suggestions):
+    """Render follow-up suggestions for the latest reply; picking one sends it as the next prompt"""
+    st.subheader("💡 Suggested Questions:")
+    with st.form("suggestions_form", clear_on_submit=True, border=False):
+        for suggestion in suggestions[:3]:  # Show top 3
+            if st.form_submit_button(suggestion):
+                # One full rerun picks the suggestion up as the chat prompt
+                st.session_state.pending_prompt = suggestion
+                st.rerun()
+
 def main():
     """Main Streamlit application"""
     
@@ -211,6 +825,9 @@ def main():
     if not check_api_health():
         st.error("⚠️ API server is not running. Please start the FastAPI server first.")
         st.code("python main.py")
+        if st.button("🔄 Check again"):
+            check_api_health.clear()
+            st.rerun()
         return
     
     # Sidebar navigation (Fixed - removed Simple Chat and Documents)
@@ -227,6 +844,112 @@ def main():
     elif page == "📊 System Stats":
         stats_page()
 
+@fragment
+def chat_sidebar():
+    """Sidebar chat management; its widgets rerun only this fragment unless the main pane must change"""
+    st.subheader("🗂️ Chat Management")
+    
+    # Create new chat
+    with st.expander("➕ New Chat", expanded=False):
+        new_chat_title = st.text_input("Chat Title (optional)", key="new_chat_title")
+        if st.button("Create New Chat", key="create_chat"):
+            result = create_new_chat(new_chat_title if new_chat_title else None)
+            if result and result.get("success"):
+                st.session_state.current_chat_id = result["chat_id"]
+                st.session_state.chat_messages[result["chat_id"]] = []
+                st.success(f"Created new chat: {result['title']}")
+                st.rerun()
+    
+    # Document upload section
+    st.subheader("📤 Upload Documents")
+    uploaded_file = st.file_uploader(
+        "Choose a file",
+        type=['txt', 'pdf', 'docx', 'doc', 'xlsx', 'xls', 'csv', 'md'],
+        help="Supported formats: TXT, PDF, DOCX, XLSX, CSV, MD"
+    )
+    
+    if uploaded_file and st.button("Upload Document"):
+        upload_progress = st.progress(0.0)
+        with st.spinner("Uploading document..."):
+            result = upload_document(uploaded_file, progress_callback=upload_progress.progress)
+            if result and result.get("success"):
+                st.success(f"Document uploaded successfully!")
+                st.info(f"Created {result.get('chunks_created', 0)} chunks")
+    
+    # Chat history, documents and any active chat search come back in one batch request
+    st.subheader("📜 Chat History")
+    chat_list_data, documents, search_results = fetch_sidebar_data(
+        st.session_state.get("chat_search")
+    )
+    
+    if chat_list_data and chat_list_data.get("success"):
+        # Chat mutations patch the session copy; it is replaced only when the server's list changes
+        if st.session_state.get("chat_list_source") != chat_list_data:
+            st.session_state.chat_list_source = chat_list_data
+            st.session_state.chat_list = chat_list_data.get("chats", [])
+        chats = st.session_state.chat_list
+        
+        # Search chats; the form only submits on Enter or the button, not per keystroke
+        with st.form("chat_search_form", border=False):
+            search_query = st.text_input("🔍 Search chats...", key="chat_search")
+            st.form_submit_button("Search")
+        if search_query:
+            if search_results and search_results.get("success"):
+                chats = search_results.get("results", [])
+        
+        # Opening one of the newest chats then needs no history request
+        prefetch_chat_histories([chat.get("chat_id") for chat in chats[:PREFETCH_CHATS]])
+        
+        # Display chats
+        for chat in chats[:20]:  # Limit to 20 for performance
+            chat_id = chat.get("chat_id")
+            title = chat.get("title", f"Chat {chat_id[:8]}")
+            message_count = chat.get("message_count", 0)
+            
+            # Chat selection button
+            if st.button(
+                f"💬 {title} ({message_count} msgs)", 
+                key=f"chat_{chat_id}",
+                help=f"Created: {chat.get('created_at', 'Unknown')}"
+            ):
+                st.session_state.current_chat_id = chat_id
+                # Load the most recent page of chat history unless it was already cached or prefetched
+                if chat_id not in st.session_state.chat_messages:
+                    load_recent_messages(chat_id)
+                st.rerun()
+            
+            # Rename and delete live behind one menu per row instead of two columns of buttons
+            with row_menu("⋯"):
+                new_title = st.text_input(
+                    "New title:", 
+                    value=title,
+                    key=f"title_{chat_id}"
+                )
+                if st.button("✅ Save title", key=f"save_{chat_id}"):
+                    if update_chat_title(chat_id, new_title):
+                        st.success("Title updated!")
+                        rerun_fragment()
+                if st.button("🗑️ Delete chat", key=f"del_{chat_id}"):
+                    if delete_chat(chat_id):
+                        st.success("Chat deleted!")
+                        # Only the open chat's deletion changes the main pane
+                        if st.session_state.current_chat_id == chat_id:
+                            st.session_state.current_chat_id = None
+                            st.rerun()
+                        rerun_fragment()
+    
+    # Document selection for context
+    st.subheader("📄 Document Context")
+    if documents:
+        doc_options = _doc_options(tuple((doc['filename'], doc['type'], doc['document_id']) for doc in documents))
+        
+        selected_doc_name = st.selectbox(
+            "Select document for context:",
+            options=list(doc_options.keys()),
+            key="doc_selector"
+        )
+        st.session_state.selected_document = doc_options[selected_doc_name]
+
 def enhanced_chat_page():
     """Enhanced chat interface with session management"""
     st.header("💬 Enhanced Chat with Session Management")
@@ -235,156 +958,49 @@ def enhanced_chat_page():
     if "current_chat_id" not in st.session_state:
         st.session_state.current_chat_id = None
     if "chat_messages" not in st.session_state:
-        st.session_state.chat_messages = {}
+        st.session_state.chat_messages = ChatMessageCache()
     if "selected_document" not in st.session_state:
         st.session_state.selected_document = None
+    if "history_start" not in st.session_state:
+        st.session_state.history_start = {}
     
     # Sidebar for chat management
     with st.sidebar:
-        st.subheader("🗂️ Chat Management")
-        
-        # Create new chat
-        with st.expander("➕ New Chat", expanded=False):
-            new_chat_title = st.text_input("Chat Title (optional)", key="new_chat_title")
-            if st.button("Create New Chat", key="create_chat"):
-                result = create_new_chat(new_chat_title if new_chat_title else None)
-                if result and result.get("success"):
-                    st.session_state.current_chat_id = result["chat_id"]
-                    st.session_state.chat_messages[result["chat_id"]] = []
-                    st.success(f"Created new chat: {result['title']}")
-                    st.rerun()
-        
-        # Document upload section
-        st.subheader("📤 Upload Documents")
-        uploaded_file = st.file_uploader(
-            "Choose a file",
-            type=['txt', 'pdf', 'docx', 'doc', 'xlsx', 'xls', 'csv', 'md'],
-            help="Supported formats: TXT, PDF, DOCX, XLSX, CSV, MD"
-        )
-        
-        if uploaded_file and st.button("Upload Document"):
-            with st.spinner("Uploading document..."):
-                result = upload_document(uploaded_file)
-                if result and result.get("success"):
-                    st.success(f"Document uploaded successfully!")
-                    st.info(f"Created {result.get('chunks_created', 0)} chunks")
-        
-        # Chat history
-        st.subheader("📜 Chat History")
-        chat_list_data = get_chat_list(limit=50)
-        
-        if chat_list_data and chat_list_data.get("success"):
-            chats = chat_list_data.get("chats", [])
-            
-            # Search chats
-            search_query = st.text_input("🔍 Search chats...", key="chat_search")
-            if search_query:
-                search_results = search_chats(search_query)
-                if search_results and search_results.get("success"):
-                    chats = search_results.get("results", [])
-            
-            # Display chats
-            for chat in chats[:20]:  # Limit to 20 for performance
-                chat_id = chat.get("chat_id")
-                title = chat.get("title", f"Chat {chat_id[:8]}")
-                message_count = chat.get("message_count", 0)
-                
-                # Chat selection button
-                if st.button(
-                    f"💬 {title} ({message_count} msgs)", 
-                    key=f"chat_{chat_id}",
-                    help=f"Created: {chat.get('created_at', 'Unknown')}"
-                ):
-                    st.session_state.current_chat_id = chat_id
-                    # Load chat history
-                    chat_history = get_chat_history(chat_id)
-                    if chat_history and chat_history.get("success"):
-                        messages = chat_history["chat"]["messages"]
-                        st.session_state.chat_messages[chat_id] = messages
-                    st.rerun()
-                
-                # Chat management buttons
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("🗑️", key=f"del_{chat_id}", help="Delete chat"):
-                        if delete_chat(chat_id):
-                            st.success("Chat deleted!")
-                            if st.session_state.current_chat_id == chat_id:
-                                st.session_state.current_chat_id = None
-                            st.rerun()
-                
-                with col2:
-                    if st.button("✏️", key=f"edit_{chat_id}", help="Edit title"):
-                        st.session_state[f"editing_{chat_id}"] = True
-                
-                # Title editing
-                if st.session_state.get(f"editing_{chat_id}", False):
-                    new_title = st.text_input(
-                        "New title:", 
-                        value=title,
-                        key=f"title_{chat_id}"
-                    )
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("✅", key=f"save_{chat_id}"):
-                            if update_chat_title(chat_id, new_title):
-                                st.success("Title updated!")
-                                st.session_state[f"editing_{chat_id}"] = False
-                                st.rerun()
-                    with col2:
-                        if st.button("❌", key=f"cancel_{chat_id}"):
-                            st.session_state[f"editing_{chat_id}"] = False
-                            st.rerun()
-        
-        # Document selection for context
-        st.subheader("📄 Document Context")
-        documents = get_documents()
-        if documents:
-            doc_options = {"None": None}
-            for doc in documents:
-                doc_options[f"{doc['filename']} ({doc['type']})"] = doc['document_id']
-            
-            selected_doc_name = st.selectbox(
-                "Select document for context:",
-                options=list(doc_options.keys()),
-                key="doc_selector"
-            )
-            st.session_state.selected_document = doc_options[selected_doc_name]
+        chat_sidebar()
     
     # Main chat interface
     if st.session_state.current_chat_id:
         st.subheader(f"Current Chat: {st.session_state.current_chat_id[:8]}...")
         
-        # Display current chat messages
-        current_messages = st.session_state.chat_messages.get(st.session_state.current_chat_id, [])
+        # Display current chat messages, refetching histories evicted from the session cache
+        if st.session_state.current_chat_id not in st.session_state.chat_messages:
+            load_recent_messages(st.session_state.current_chat_id)
+        
+        # Older messages are fetched a page at a time on request
+        older_count = st.session_state.history_start.get(st.session_state.current_chat_id, 0)
+        if older_count and st.button(f"⬆️ Load older messages ({older_count} more)", key="load_older_messages"):
+            load_older_messages(st.session_state.current_chat_id)
+        
+        current_messages = st.session_state.chat_messages[st.session_state.current_chat_id]
         
         # Create a container for messages
         message_container = st.container()
         
         with message_container:
-            for message in current_messages:
-                role = message.get("role", "user")
-                content = message.get("content", "")
-                
-                with st.chat_message(role):
-                    st.markdown(content)
-                    
-                    # Show metadata for assistant messages (Fixed the error)
-                    if role == "assistant" and "metadata" in message:
-                        metadata = message["metadata"]
-                        context_docs = metadata.get("context_documents", [])
-                        # Fix: Ensure context_documents is a list before joining
-                        if isinstance(context_docs, list) and context_docs:
-                            st.caption(f"📄 Used documents: {', '.join(context_docs)}")
-                        elif context_docs:  # If it's a string or other type
-                            st.caption(f"📄 Used documents: {context_docs}")
-                        
-                        response_type = metadata.get("response_type", "general")
-                        if response_type != "general":
-                            st.caption(f"🏷️ Response type: {response_type}")
+            for message in current_messages[:-1]:
+                render_chat_message(message)
+            
+            # Only the latest assistant reply carries the suggestions block
+            if current_messages:
+                last_message = current_messages[-1]
+                render_chat_message(last_message)
+                suggestions = last_message.get("metadata", {}).get("suggestions")
+                if last_message.get("role") == "assistant" and suggestions:
+                    render_suggestions(suggestions)
         
         # Chat input
-        if prompt := st.chat_input("Ask me anything..."):
+        chat_prompt = st.chat_input("Ask me anything...")
+        if prompt := chat_prompt or st.session_state.pop("pending_prompt", None):
             # Add user message to display
             with st.chat_message("user"):
                 st.markdown(prompt)
@@ -400,54 +1016,39 @@ def enhanced_chat_page():
             
             # Get AI response
             with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    response = send_message_to_chat(
-                        st.session_state.current_chat_id,
-                        prompt,
-                        st.session_state.selected_document
-                    )
+                # Render tokens as they arrive instead of waiting for the whole reply
+                stream_result = {}
+                st.write_stream(stream_message_to_chat(
+                    st.session_state.current_chat_id,
+                    prompt,
+                    st.session_state.selected_document,
+                    stream_result
+                ))
+                response = stream_result.get("response")
+                
+                if response and response.get("success"):
+                    metadata = {
+                        "context_documents": response.get("context_documents", []),
+                        "response_type": response.get("response_type", "general"),
+                        "timestamp": response.get("timestamp"),
+                        "suggestions": response.get("suggestions", [])
+                    }
                     
-                    if response and response.get("success"):
-                        ai_response = response["response"]
-                        st.markdown(ai_response)
-                        
-                        # Show context information (Fixed the error)
-                        context_docs = response.get("context_documents", [])
-                        if isinstance(context_docs, list) and context_docs:
-                            st.caption(f"📄 Used documents: {', '.join(context_docs)}")
-                        elif context_docs:  # If it's a string or other type
-                            st.caption(f"📄 Used documents: {context_docs}")
-                        
-                        response_type = response.get("response_type", "general")
-                        if response_type != "general":
-                            st.caption(f"🏷️ Response type: {response_type}")
-                        
-                        # Show suggestions
-                        suggestions = response.get("suggestions", [])
-                        if suggestions:
-                            st.subheader("💡 Suggested Questions:")
-                            for i, suggestion in enumerate(suggestions[:3]):  # Show top 3
-                                if st.button(suggestion, key=f"suggestion_{i}"):
-                                    # Auto-fill the suggestion
-                                    st.session_state.suggestion_clicked = suggestion
-                        
-                        # Add assistant message to session state (Fixed metadata structure)
-                        st.session_state.chat_messages[st.session_state.current_chat_id].append({
-                            "role": "assistant",
-                            "content": ai_response,
-                            "metadata": {
-                                "context_documents": context_docs,
-                                "response_type": response_type,
-                                "timestamp": response.get("timestamp")
-                            }
-                        })
-                    else:
-                        st.error("Failed to get response from AI assistant")
-        
-        # Handle suggestion clicks
-        if hasattr(st.session_state, 'suggestion_clicked'):
-            st.text_input("Suggested question:", value=st.session_state.suggestion_clicked, key="suggestion_input")
-            del st.session_state.suggestion_clicked
+                    # Show context information
+                    _render_context_caption(metadata)
+                    
+                    # Add assistant message to session state
+                    st.session_state.chat_messages[st.session_state.current_chat_id].append({
+                        "role": "assistant",
+                        "content": response["response"],
+                        "metadata": metadata
+                    })
+                else:
+                    st.error("Failed to get response from AI assistant")
+            
+            # Rerun so the new reply and its suggestions render through the history path
+            if response and response.get("success") and response.get("suggestions"):
+                st.rerun()
     
     else:
         st.info("👈 Create a new chat or select an existing one from the sidebar to start chatting!")
@@ -480,36 +1081,97 @@ def enhanced_chat_page():
                     st.session_state.chat_messages[result["chat_id"]] = []
                     st.rerun()
 
+# Runs of anything but word characters, dots and dashes (including emoji) in download names
+_SAFE_NAME_RE = re.compile(r'[^\w.-]+')
+
+def _safe_filename(stem, ext):
+    """Download file name built from free text such as a report title or analysis category"""
+    return f"{_SAFE_NAME_RE.sub('_', stem).strip('_')}.{ext}"
+
+@lru_cache(maxsize=256)
+def _strip_business_prefix(filename):
+    """Display name for a business upload, without its Business_ prefix"""
+    return filename[len('Business_'):] if filename.startswith('Business_') else filename
+
+@fragment
+def quick_analysis_panel(selected_doc):
+    """Quick analysis buttons and their results; a click reruns only this panel"""
+    st.subheader("⚡ Quick Analysis")
+    
+    col_q1, col_q2, col_q3 = st.columns(3)
+    
+    for column, (analysis_key, analysis) in zip((col_q1, col_q2, col_q3), QUICK_ANALYSES.items()):
+        with column:
+            if st.button(analysis['label'], key=analysis['button_key'], type="primary"):
+                with st.spinner(analysis['spinner']):
+                    response = send_message_to_chat(
+                        "business_analysis_session",
+                        analysis['prompt'],
+                        selected_doc['document_id']
+                    )
+                    if response and response.get("success"):
+                        st.session_state.analysis_results[analysis_key] = response["response"]
+    
+    # One request runs all three analyses concurrently on the server
+    if st.button("🚀 Run All Analyses", key="quick_all"):
+        with st.spinner("Running revenue, cost and KPI analyses..."):
+            responses = run_business_batch(
+                selected_doc['document_id'],
+                {key: analysis['prompt'] for key, analysis in QUICK_ANALYSES.items()}
+            )
+        for analysis_key, response in responses.items():
+            if response:
+                st.session_state.analysis_results[analysis_key] = response
+    
+    # Display analysis results; an expander would still render every body, so each
+    # result gets a toggle and only open ones are rendered (the newest starts open)
+    if st.session_state.analysis_results:
+        st.subheader("📋 Analysis Results")
+        
+        latest = next(reversed(st.session_state.analysis_results))
+        for analysis_type, result in st.session_state.analysis_results.items():
+            if st.toggle(f"📊 {analysis_type.title()} Analysis", value=analysis_type == latest, key=f"open_{analysis_type}"):
+                render_card(_ANALYSIS_CARD, result)
+
+def render_report_button(report_key, report, selected_doc):
+    """Draw one Reports-tab button and stream its report below it when clicked
+    
+    On other reruns the report generated earlier in the session is shown again without a request.
+    """
+    if st.button(report['label'], key=report_key):
+        st.markdown(f"### {report['label']}")
+        stream_business_reply(
+            "business_analysis_session",
+            report['prompt'],
+            selected_doc['document_id']
+        )
+    else:
+        stored = stored_business_reply(report['prompt'], selected_doc['document_id'])
+        if stored:
+            st.markdown(f"### {report['label']}")
+            st.markdown(stored)
+
+def _set_business_query(query):
+    """Button callback that fills (or clears) the advanced analysis question"""
+    st.session_state.business_query_input = query
+
+def _pick_business_suggestion(pill_key):
+    """Pills callback that copies the chosen suggestion into the question box"""
+    suggestion = st.session_state.get(pill_key)
+    if suggestion:
+        _set_business_query(suggestion)
+
 def business_page():
     """Enhanced business analysis page with graphs, tables, and advanced analytics"""
     st.header("💼 Business Analysis & Insights Dashboard")
     
     # Custom CSS for better styling
-    st.markdown("""
-    <style>
-    .metric-card {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        margin: 0.5rem 0;
-    }
-    .analysis-card {
-        background: #f8f9fa;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 4px solid #007bff;
-        margin: 1rem 0;
-    }
-    .insight-box {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 8px;
-        color: white;
-        margin: 0.5rem 0;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_BUSINESS_CSS, unsafe_allow_html=True)
+    
+    # Analysis results are kept for the session; this clears them so each runs again
+    if st.button("♻️ Re-run Analyses (bypass cache)", key="clear_analysis_cache"):
+        st.session_state.pop("streamed_replies", None)
+        st.session_state.pop("advanced_results", None)
     
     # Initialize session state for business documents
     if "business_documents" not in st.session_state:
@@ -519,6 +1181,11 @@ def business_page():
     if "analysis_results" not in st.session_state:
         st.session_state.analysis_results = {}
     
+    # The selected document, its ID and display name are read once and shared by every tab
+    selected_doc = st.session_state.selected_business_doc
+    doc_id = selected_doc['document_id'] if selected_doc else None
+    doc_name = _strip_business_prefix(selected_doc['filename']) if selected_doc else None
+    
     # Main layout with tabs
     tab1, tab2, tab3, tab4 = st.tabs(["📊 Dashboard", "📈 Analysis", "📋 Reports", "🔧 Settings"])
     
@@ -554,11 +1221,12 @@ def business_page():
                     st.info(f"📄 **File:** {file_info['name']}\n📏 **Size:** {file_info['size']}\n🏷️ **Type:** {file_info['type']}")
                     
                     if st.button("🚀 Upload & Process", key="upload_business", type="primary"):
+                        upload_progress = st.progress(0.0)
                         with st.spinner("🔄 Processing business document..."):
                             try:
                                 # Use custom name if provided, otherwise use Business_ prefix
                                 upload_name = custom_name if custom_name else f"Business_{business_file.name}"
-                                result = upload_document(business_file, upload_name)
+                                result = upload_document(business_file, upload_name, upload_progress.progress)
                                 
                                 if result and result.get("success"):
                                     st.success("✅ Document uploaded successfully!")
@@ -589,7 +1257,7 @@ def business_page():
                 
                 if business_docs:
                     for i, doc in enumerate(business_docs):
-                        doc_name = doc['filename'].replace('Business_', '') if doc['filename'].startswith('Business_') else doc['filename']
+                        display_name = _strip_business_prefix(doc['filename'])
                         
                         # Document card
                         with st.container():
@@ -597,12 +1265,12 @@ def business_page():
                             
                             with col_x:
                                 if st.button(
-                                    f"📊 {doc_name}",
+                                    f"📊 {display_name}",
                                     key=f"select_biz_{doc['document_id']}",
                                     help=f"Type: {doc['type']} | Chunks: {doc['chunks']}"
                                 ):
                                     st.session_state.selected_business_doc = doc
-                                    st.success(f"Selected: {doc_name}")
+                                    st.success(f"Selected: {display_name}")
                                     st.rerun()
                             
                             with col_y:
@@ -612,17 +1280,10 @@ def business_page():
                                 st.caption(f"🏷️ {doc['type']}")
                     
                     # Show selected document
-                    if st.session_state.selected_business_doc:
-                        selected_doc = st.session_state.selected_business_doc
-                        doc_name = selected_doc['filename'].replace('Business_', '') if selected_doc['filename'].startswith('Business_') else selected_doc['filename']
-                        
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <h4>📋 Currently Selected</h4>
-                            <p><strong>{doc_name}</strong></p>
-                            <p>Type: {selected_doc['type']} | Chunks: {selected_doc['chunks']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
+                    if selected_doc:
+                        st.markdown(_SELECTED_DOC_CARD.substitute(
+                            name=doc_name, type=selected_doc['type'], chunks=selected_doc['chunks']
+                        ), unsafe_allow_html=True)
                 else:
                     st.info("📝 No business documents found. Upload documents above to get started.")
             else:
@@ -631,10 +1292,7 @@ def business_page():
         with col2:
             st.subheader("📊 Quick Analytics Dashboard")
             
-            if st.session_state.selected_business_doc:
-                selected_doc = st.session_state.selected_business_doc
-                doc_name = selected_doc['filename'].replace('Business_', '') if selected_doc['filename'].startswith('Business_') else selected_doc['filename']
-                
+            if selected_doc:
                 # Quick metrics
                 col_m1, col_m2, col_m3, col_m4 = st.columns(4)
                 with col_m1:
@@ -646,75 +1304,24 @@ def business_page():
                 with col_m4:
                     st.metric("📅 Status", "Ready", "✅")
                 
-                # Quick analysis buttons
-                st.subheader("⚡ Quick Analysis")
-                
-                col_q1, col_q2, col_q3 = st.columns(3)
-                
-                with col_q1:
-                    if st.button("📈 Revenue Analysis", key="quick_revenue", type="primary"):
-                        with st.spinner("Analyzing revenue data..."):
-                            response = send_message_to_chat(
-                                "business_analysis_session",
-                                "Provide a comprehensive revenue analysis including trends, growth rates, seasonal patterns, and key revenue drivers. Include specific numbers and percentages where available.",
-                                selected_doc['document_id']
-                            )
-                            if response and response.get("success"):
-                                st.session_state.analysis_results['revenue'] = response["response"]
-                                st.rerun()
-                
-                with col_q2:
-                    if st.button("💰 Cost Analysis", key="quick_cost", type="primary"):
-                        with st.spinner("Analyzing cost structure..."):
-                            response = send_message_to_chat(
-                                "business_analysis_session",
-                                "Analyze all costs and expenses, categorize them, identify cost drivers, and suggest optimization opportunities. Include cost ratios and trends.",
-                                selected_doc['document_id']
-                            )
-                            if response and response.get("success"):
-                                st.session_state.analysis_results['costs'] = response["response"]
-                                st.rerun()
-                
-                with col_q3:
-                    if st.button("🎯 KPI Dashboard", key="quick_kpi", type="primary"):
-                        with st.spinner("Calculating KPIs..."):
-                            response = send_message_to_chat(
-                                "business_analysis_session",
-                                "Calculate and present key performance indicators (KPIs) including profitability ratios, efficiency metrics, growth rates, and benchmark comparisons. Format as a dashboard.",
-                                selected_doc['document_id']
-                            )
-                            if response and response.get("success"):
-                                st.session_state.analysis_results['kpis'] = response["response"]
-                                st.rerun()
-                
-                # Display analysis results
-                if st.session_state.analysis_results:
-                    st.subheader("📋 Analysis Results")
-                    
-                    for analysis_type, result in st.session_state.analysis_results.items():
-                        with st.expander(f"📊 {analysis_type.title()} Analysis", expanded=True):
-                            st.markdown(f"""
-                            <div class="analysis-card">
-                                {result}
-                            </div>
-                            """, unsafe_allow_html=True)
+                # Quick analysis buttons and results rerun on their own
+                quick_analysis_panel(selected_doc)
                 
                 # Auto-analysis results
-                if 'auto_analyze_doc' in st.session_state and st.session_state['auto_analyze_doc'] == selected_doc['document_id']:
+                if 'auto_analyze_doc' in st.session_state and st.session_state['auto_analyze_doc'] == doc_id:
                     st.subheader("🤖 Auto-Analysis Results")
                     with st.spinner("Running comprehensive auto-analysis..."):
                         auto_response = send_message_to_chat(
                             "business_analysis_session",
                             "Perform a comprehensive business analysis of this document. Include: 1) Executive Summary, 2) Key Financial Metrics, 3) Trends Analysis, 4) Insights & Recommendations. Present in a clear, structured format.",
-                            selected_doc['document_id']
+                            doc_id
                         )
                         if auto_response and auto_response.get("success"):
-                            st.markdown(f"""
-                            <div class="insight-box">
-                                <h4>🎯 Comprehensive Business Analysis</h4>
-                                {auto_response["response"]}
-                            </div>
-                            """, unsafe_allow_html=True)
+                            render_card(
+                                _INSIGHT_BOX,
+                                auto_response["response"],
+                                heading="<h4>🎯 Comprehensive Business Analysis</h4>"
+                            )
                     del st.session_state['auto_analyze_doc']
             
             else:
@@ -735,26 +1342,13 @@ def business_page():
                     st.metric("📊 Profit", "$36,000", "↗️ +28%")
                 
                 # Sample chart
-                import numpy as np
-                sample_data = pd.DataFrame({
-                    'Month': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
-                    'Revenue': [20000, 25000, 22000, 28000, 32000, 35000],
-                    'Expenses': [15000, 18000, 16000, 20000, 22000, 24000]
-                })
-                
-                fig = px.line(sample_data, x='Month', y=['Revenue', 'Expenses'], 
-                             title="📈 Sample Revenue vs Expenses Trend",
-                             color_discrete_map={'Revenue': '#1f77b4', 'Expenses': '#ff7f0e'})
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(build_sample_dashboard_figure(), use_container_width=True)
     
     with tab2:
         # Advanced Analysis Tab
         st.subheader("🔬 Advanced Business Analysis")
         
-        if st.session_state.selected_business_doc:
-            selected_doc = st.session_state.selected_business_doc
-            doc_name = selected_doc['filename'].replace('Business_', '') if selected_doc['filename'].startswith('Business_') else selected_doc['filename']
-            
+        if selected_doc:
             st.markdown(f"**📊 Analyzing:** {doc_name}")
             
             # Analysis type selector
@@ -781,79 +1375,41 @@ def business_page():
                     ["📝 Detailed Report", "📊 Executive Summary", "📈 Data Visualization", "📋 Table Format"]
                 )
             
-            # Dynamic query suggestions based on category
-            query_suggestions = {
-                "📈 Financial Performance": [
-                    "What are the key financial performance indicators?",
-                    "How has profitability changed over time?",
-                    "What are the main revenue streams and their performance?",
-                    "Calculate financial ratios and their implications"
-                ],
-                "📊 Operational Metrics": [
-                    "What are the operational efficiency metrics?",
-                    "Identify bottlenecks and improvement opportunities",
-                    "Analyze productivity trends and patterns",
-                    "Compare operational costs across periods"
-                ],
-                "💰 Profitability Analysis": [
-                    "Break down profit margins by product/service",
-                    "Identify most and least profitable segments",
-                    "Analyze cost structure and optimization opportunities",
-                    "Calculate return on investment metrics"
-                ],
-                "📉 Risk Assessment": [
-                    "Identify financial and operational risks",
-                    "Assess cash flow volatility and stability",
-                    "Analyze dependency on key customers/suppliers",
-                    "Evaluate market and competitive risks"
-                ],
-                "🎪 Market Analysis": [
-                    "Analyze market share and competitive position",
-                    "Identify market trends and opportunities",
-                    "Assess customer segmentation and behavior",
-                    "Evaluate pricing strategy effectiveness"
-                ],
-                "🔮 Forecasting & Trends": [
-                    "Generate revenue and expense forecasts",
-                    "Identify seasonal patterns and trends",
-                    "Predict future performance based on historical data",
-                    "Scenario analysis for different market conditions"
-                ],
-                "⚖️ Comparative Analysis": [
-                    "Compare performance across time periods",
-                    "Benchmark against industry standards",
-                    "Analyze variance from budget/targets",
-                    "Compare different business units/products"
-                ]
-            }
-            
             # Business query input with suggestions
             st.subheader("💭 Analysis Query")
             
-            # Quick suggestion buttons
+            # Quick suggestions; callbacks run before the rerun, so the text area below already shows the choice
             if analysis_category != "🎯 Custom Analysis":
-                st.write("**💡 Quick Suggestions:**")
-                suggestions = query_suggestions.get(analysis_category, [])
+                suggestions = QUERY_SUGGESTIONS.get(analysis_category, [])
                 
-                cols = st.columns(2)
-                for i, suggestion in enumerate(suggestions):
-                    with cols[i % 2]:
-                        if st.button(suggestion, key=f"suggestion_{i}"):
-                            st.session_state.selected_query = suggestion
+                if hasattr(st, "pills"):
+                    # One widget for the whole list instead of a button per suggestion
+                    pill_key = f"suggestion_pill_{analysis_category}"
+                    st.pills(
+                        "**💡 Quick Suggestions:**",
+                        options=suggestions,
+                        selection_mode="single",
+                        key=pill_key,
+                        on_change=_pick_business_suggestion,
+                        args=(pill_key,)
+                    )
+                else:
+                    st.write("**💡 Quick Suggestions:**")
+                    cols = st.columns(2)
+                    for i, suggestion in enumerate(dict.fromkeys(suggestions)):
+                        with cols[i % 2]:
+                            st.button(suggestion, key=suggestion_key(suggestion), on_click=_set_business_query, args=(suggestion,))
             
             # Custom query input
             business_query = st.text_area(
                 "✍️ Enter your business question:",
-                value=st.session_state.get('selected_query', ''),
                 placeholder=f"Ask any question about {doc_name}...",
                 height=120,
                 key="business_query_input"
             )
             
             # Clear selection
-            if st.button("🗑️ Clear Query"):
-                st.session_state.selected_query = ""
-                st.rerun()
+            st.button("🗑️ Clear Query", on_click=_set_business_query, args=("",))
             
             # Advanced options
             with st.expander("⚙️ Advanced Options"):
@@ -865,79 +1421,102 @@ def business_page():
             # Analyze button
             if st.button("🚀 Run Advanced Analysis", key="advanced_analysis", type="primary"):
                 if business_query:
-                    with st.spinner("🔬 Running advanced business analysis..."):
-                        # Construct enhanced query
-                        enhanced_query = f"""
-                        Perform a {analysis_category} analysis on this business document.
-                        
-                        Specific Question: {business_query}
-                        
-                        Requirements:
-                        - Output Format: {output_format}
-                        - Include Charts: {include_charts}
-                        - Include Tables: {include_tables}
-                        - Include Recommendations: {include_recommendations}
-                        - Confidence Level: {confidence_level}
-                        
-                        Please provide a comprehensive analysis with specific numbers, percentages, and actionable insights.
-                        """
-                        
-                        response = send_message_to_chat(
-                            "business_analysis_session",
-                            enhanced_query,
-                            selected_doc['document_id']
-                        )
+                    # Construct enhanced query
+                    enhanced_query = f"""
+                    Perform a {analysis_category} analysis on this business document.
+                    
+                    Specific Question: {business_query}
+                    
+                    Requirements:
+                    - Output Format: {output_format}
+                    - Include Charts: {include_charts}
+                    - Include Tables: {include_tables}
+                    - Include Recommendations: {include_recommendations}
+                    - Confidence Level: {confidence_level}
+                    
+                    Please provide a comprehensive analysis with specific numbers, percentages, and actionable insights.
+                    
+                    Respond with only a JSON object with two string fields:
+                    "report" - the full analysis in markdown, and
+                    "insights" - the top 5 key insights and actionable recommendations in markdown.
+                    """
+                    
+                    # Results live in session state so reruns from other widgets don't discard them
+                    result_key = hashlib.blake2b(
+                        (enhanced_query + doc_id).encode('utf-8'), digest_size=16
+                    ).hexdigest()
+                    advanced_results = st.session_state.setdefault("advanced_results", {})
+                    
+                    if result_key not in advanced_results:
+                        with st.spinner("🔬 Running advanced business analysis..."):
+                            response = send_message_to_chat(
+                                "business_analysis_session",
+                                enhanced_query,
+                                doc_id
+                            )
                         
                         if response and response.get("success"):
-                            st.success("✅ Analysis complete!")
-                            
-                            # Display results in an attractive format
-                            st.markdown("---")
-                            st.subheader("📊 Analysis Results")
-                            
-                            # Create tabs for different views
-                            result_tab1, result_tab2, result_tab3 = st.tabs(["📝 Report", "💡 Insights", "📋 Raw Data"])
-                            
-                            with result_tab1:
-                                st.markdown(f"""
-                                <div class="analysis-card">
-                                    <h4>🎯 {analysis_category} - {output_format}</h4>
-                                    {response["response"]}
-                                </div>
-                                """, unsafe_allow_html=True)
-                            
-                            with result_tab2:
-                                # Extract key insights
-                                insights_query = f"Extract the top 5 key insights and actionable recommendations from this analysis: {response['response'][:1000]}..."
-                                insights_response = send_message_to_chat(
-                                    "business_analysis_session",
-                                    insights_query,
-                                    selected_doc['document_id']
-                                )
-                                
-                                if insights_response and insights_response.get("success"):
-                                    st.markdown(f"""
-                                    <div class="insight-box">
-                                        <h4>💡 Key Insights & Recommendations</h4>
-                                        {insights_response["response"]}
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                            
-                            with result_tab3:
-                                st.text_area("Raw Analysis Data", response["response"], height=400)
-                                
-                                # Download option
-                                if st.download_button(
-                                    "📥 Download Analysis Report",
-                                    data=response["response"],
-                                    file_name=f"business_analysis_{doc_name}_{analysis_category.replace('📈 ', '').replace(' ', '_')}.txt",
-                                    mime="text/plain"
-                                ):
-                                    st.success("📥 Report downloaded!")
+                            # The report and its insights come back together from one request
+                            report, insights = split_report_and_insights(response["response"])
+                            advanced_results[result_key] = {
+                                "document_id": doc_id,
+                                "category": analysis_category,
+                                "output_format": output_format,
+                                "report": report,
+                                "insights": insights,
+                                "raw": response["response"]
+                            }
                         else:
                             st.error("❌ Analysis failed. Please try again.")
+                    
+                    if result_key in advanced_results:
+                        st.session_state.last_advanced_result = result_key
+                        st.success("✅ Analysis complete!")
                 else:
                     st.warning("⚠️ Please enter a business question to analyze.")
+            
+            # Keep showing the latest analysis of this document until another one replaces it
+            advanced_result = st.session_state.get("advanced_results", {}).get(
+                st.session_state.get("last_advanced_result")
+            )
+            if advanced_result and advanced_result["document_id"] == doc_id:
+                # Display results in an attractive format
+                st.markdown("---")
+                st.subheader("📊 Analysis Results")
+                
+                # Create tabs for different views
+                result_tab1, result_tab2, result_tab3 = st.tabs(["📝 Report", "💡 Insights", "📋 Raw Data"])
+                
+                with result_tab1:
+                    render_card(
+                        _ANALYSIS_CARD,
+                        advanced_result["report"],
+                        heading=f"<h4>🎯 {advanced_result['category']} - {advanced_result['output_format']}</h4>"
+                    )
+                
+                with result_tab2:
+                    if advanced_result["insights"]:
+                        render_card(
+                            _INSIGHT_BOX,
+                            advanced_result["insights"],
+                            heading="<h4>💡 Key Insights & Recommendations</h4>"
+                        )
+                    else:
+                        st.info("No separate insights were returned; see the full report.")
+                
+                with result_tab3:
+                    # Collapsed by default; a read-only code block instead of an editable widget
+                    with st.expander("Raw Analysis Data", expanded=False):
+                        st.code(advanced_result["raw"], language="markdown")
+                    
+                    # Download option
+                    if st.download_button(
+                        "📥 Download Analysis Report",
+                        data=advanced_result["report"],
+                        file_name=_safe_filename(f"business_analysis_{doc_name}_{advanced_result['category']}", "txt"),
+                        mime="text/plain"
+                    ):
+                        st.success("📥 Report downloaded!")
         else:
             st.info("👈 Please select a business document from the Dashboard tab to start advanced analysis.")
     
@@ -945,86 +1524,31 @@ def business_page():
         # Reports Tab
         st.subheader("📋 Business Reports & Exports")
         
-        if st.session_state.selected_business_doc:
-            selected_doc = st.session_state.selected_business_doc
-            doc_name = selected_doc['filename'].replace('Business_', '') if selected_doc['filename'].startswith('Business_') else selected_doc['filename']
-            
+        if selected_doc:
             st.write(f"**📊 Generate Reports for:** {doc_name}")
             
             # Report types
             col_r1, col_r2 = st.columns(2)
             
-            with col_r1:
-                st.subheader("📈 Financial Reports")
-                
-                if st.button("💰 Income Statement", key="income_statement"):
-                    with st.spinner("Generating Income Statement..."):
-                        response = send_message_to_chat(
-                            "business_analysis_session",
-                            "Generate a detailed Income Statement (Profit & Loss) report with revenues, expenses, and net income calculations. Format as a professional financial statement.",
-                            selected_doc['document_id']
-                        )
-                        if response and response.get("success"):
-                            st.markdown("### 💰 Income Statement")
-                            st.markdown(response["response"])
-                
-                if st.button("💎 Balance Sheet Analysis", key="balance_sheet"):
-                    with st.spinner("Generating Balance Sheet Analysis..."):
-                        response = send_message_to_chat(
-                            "business_analysis_session",
-                            "Analyze the balance sheet data including assets, liabilities, and equity. Calculate key ratios and provide insights on financial position.",
-                            selected_doc['document_id']
-                        )
-                        if response and response.get("success"):
-                            st.markdown("### 💎 Balance Sheet Analysis")
-                            st.markdown(response["response"])
-                
-                if st.button("💸 Cash Flow Report", key="cash_flow"):
-                    with st.spinner("Generating Cash Flow Report..."):
-                        response = send_message_to_chat(
-                            "business_analysis_session",
-                            "Generate a comprehensive cash flow analysis including operating, investing, and financing activities. Identify cash flow trends and liquidity position.",
-                            selected_doc['document_id']
-                        )
-                        if response and response.get("success"):
-                            st.markdown("### 💸 Cash Flow Report")
-                            st.markdown(response["response"])
+            for column, (group, reports) in zip((col_r1, col_r2), REPORT_GROUPS.items()):
+                with column:
+                    st.subheader(group)
+                    
+                    for report_key, report in reports.items():
+                        render_report_button(report_key, report, selected_doc)
             
-            with col_r2:
-                st.subheader("📊 Operational Reports")
-                
-                if st.button("📈 Performance Dashboard", key="performance_dashboard"):
-                    with st.spinner("Creating Performance Dashboard..."):
-                        response = send_message_to_chat(
-                            "business_analysis_session",
-                            "Create a comprehensive performance dashboard with KPIs, metrics, trends, and performance indicators. Include visual elements and key insights.",
-                            selected_doc['document_id']
-                        )
-                        if response and response.get("success"):
-                            st.markdown("### 📈 Performance Dashboard")
-                            st.markdown(response["response"])
-                
-                if st.button("🎯 Executive Summary", key="executive_summary"):
-                    with st.spinner("Generating Executive Summary..."):
-                        response = send_message_to_chat(
-                            "business_analysis_session",
-                            "Create an executive summary highlighting key financial performance, major insights, trends, risks, and strategic recommendations for leadership review.",
-                            selected_doc['document_id']
-                        )
-                        if response and response.get("success"):
-                            st.markdown("### 🎯 Executive Summary")
-                            st.markdown(response["response"])
-                
-                if st.button("⚠️ Risk Assessment Report", key="risk_assessment"):
-                    with st.spinner("Generating Risk Assessment..."):
-                        response = send_message_to_chat(
-                            "business_analysis_session",
-                            "Conduct a comprehensive risk assessment including financial risks, operational risks, market risks, and mitigation strategies.",
-                            selected_doc['document_id']
-                        )
-                        if response and response.get("success"):
-                            st.markdown("### ⚠️ Risk Assessment Report")
-                            st.markdown(response["response"])
+            # Every report is generated concurrently by one request, so this takes as long as the slowest one
+            if st.button("📚 Generate All Reports", key="all_reports"):
+                all_reports = {key: report for reports in REPORT_GROUPS.values() for key, report in reports.items()}
+                with st.spinner(f"Generating {len(all_reports)} reports..."):
+                    responses = run_business_batch(
+                        doc_id,
+                        {key: report['prompt'] for key, report in all_reports.items()}
+                    )
+                for report_key, report in all_reports.items():
+                    if responses.get(report_key):
+                        st.markdown(f"### {report['label']}")
+                        st.markdown(responses[report_key])
             
             # Custom report generator
             st.subheader("🛠️ Custom Report Generator")
@@ -1039,33 +1563,30 @@ def business_page():
             
             if st.button("📊 Generate Custom Report", key="custom_report"):
                 if report_title and report_sections:
-                    with st.spinner("Generating custom report..."):
-                        custom_query = f"""
-                        Generate a {report_format} business report titled "{report_title}" 
-                        including the following sections: {', '.join(report_sections)}.
-                        
-                        Make it comprehensive, professional, and include specific data points,
-                        charts descriptions, and actionable insights.
-                        """
-                        
-                        response = send_message_to_chat(
-                            "business_analysis_session",
-                            custom_query,
-                            selected_doc['document_id']
-                        )
-                        
-                        if response and response.get("success"):
-                            st.markdown(f"### 📊 {report_title}")
-                            st.markdown(response["response"])
-                            
-                            # Download option
-                            if st.download_button(
-                                "📥 Download Report",
-                                data=response["response"],
-                                file_name=f"{report_title.replace(' ', '_')}_report.txt",
-                                mime="text/plain"
-                            ):
-                                st.success("📥 Report downloaded successfully!")
+                    custom_query = f"""
+                    Generate a {report_format} business report titled "{report_title}" 
+                    including the following sections: {', '.join(report_sections)}.
+                    
+                    Make it comprehensive, professional, and include specific data points,
+                    charts descriptions, and actionable insights.
+                    """
+                    
+                    st.markdown(f"### 📊 {report_title}")
+                    report_text = stream_business_reply(
+                        "business_analysis_session",
+                        custom_query,
+                        doc_id
+                    )
+                    
+                    if report_text:
+                        # Download option
+                        if st.download_button(
+                            "📥 Download Report",
+                            data=report_text,
+                            file_name=_safe_filename(f"{report_title}_report", "txt"),
+                            mime="text/plain"
+                        ):
+                            st.success("📥 Report downloaded successfully!")
                 else:
                     st.warning("⚠️ Please provide a report title and select sections.")
         else:
@@ -1118,7 +1639,7 @@ def business_page():
             st.info("⚡ **Speed:** Real-time Processing")
         
         # General business insights section for when no document is selected
-        if not st.session_state.selected_business_doc:
+        if not selected_doc:
             st.markdown("---")
             st.subheader("💡 General Business Insights")
             
@@ -1135,11 +1656,7 @@ def business_page():
                         if insights:
                             st.success("💡 Insights generated!")
                             st.markdown("### 💡 Business Insights:")
-                            st.markdown(f"""
-                            <div class="insight-box">
-                                {insights}
-                            </div>
-                            """, unsafe_allow_html=True)
+                            render_card(_INSIGHT_BOX, insights)
                 else:
                     st.warning("⚠️ Please enter a business question")
 
@@ -1147,6 +1664,10 @@ def stats_page():
     """System statistics page"""
     st.header("📊 System Statistics")
     
+    # Stats are cached briefly; refresh drops every cached read so the page refetches now
+    if st.button("🔄 Refresh", key="refresh_stats"):
+        invalidate_api_cache()
+    
     # Get and display system stats
     with st.spinner("Loading system statistics..."):
         stats = get_system_stats()
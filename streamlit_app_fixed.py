@@ -1,12 +1,22 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
-import os
-from pathlib import Path
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except ImportError:
+    ws_connect = None
 
 # Configure page
 st.set_page_config(
@@ -18,11 +28,63 @@ st.set_page_config(
 
 # API base URL
 API_BASE = "http://localhost:8000/api/v1"
+# Same endpoint over WebSockets (http -> ws, https -> wss)
+WS_BASE = "ws" + API_BASE[len("http"):]
+# Messages kept in session state per chat; older ones are paged in on demand
+MAX_SESSION_MESSAGES = 200
+# Most recent chats whose history is loaded ahead of a click
+PREFETCH_CHATS = 3
+
+# (connect, read) timeout in seconds; reads allow for slow LLM responses
+REQUEST_TIMEOUT = (5, 120)
+
+# orjson parses and serializes API payloads several times faster than the stdlib
+_loads = orjson.loads if orjson is not None else json.loads
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _dumps(payload):
+    """Serialize a request payload to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so API calls reuse pooled keep-alive connections across reruns"""
+    session = requests.Session()
+    # Idempotent methods retry briefly on dropped connections and gateway errors
+    retry = Retry(total=2, backoff_factor=0.1, status_forcelist=(502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http = get_http_session()
 
+# Read endpoints are cached briefly because Streamlit reruns the whole script
+# on every interaction; failures raise so they are never cached
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_get(path, params=None):
+    """GET an API path and return its JSON body"""
+    response = http.get(f"{API_BASE}{path}", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return _loads(response.content)
+
+def invalidate_api_cache():
+    """Drop cached API reads after a mutation so the next rerun sees fresh data"""
+    cached_get.clear()
+
+@st.cache_data(show_spinner=False)
+def _doc_options(docs_tuple):
+    """Map selectbox labels to document ids for (filename, type, document_id) tuples"""
+    return {"None": None, **{f"{filename} ({doc_type})": document_id for filename, doc_type, document_id in docs_tuple}}
+
+# Probed at most every 10 seconds instead of on every rerun
+@st.cache_data(ttl=10, show_spinner=False)
 def check_api_health():
     """Check if API is running"""
     try:
-        response = requests.get(f"{API_BASE}/health", timeout=5)
+        response = http.get(f"{API_BASE}/health", timeout=2)
         return response.status_code == 200
     except:
         return False
@@ -35,9 +97,9 @@ def send_chat_message(message, conversation_id=None, include_context=True):
             "conversation_id": conversation_id,
             "include_context": include_context
         }
-        response = requests.post(f"{API_BASE}/chat", json=payload)
+        response = http.post(f"{API_BASE}/chat", data=_dumps(payload), headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error sending message: {str(e)}")
         return None
@@ -47,9 +109,10 @@ def create_new_chat(title=None):
     """Create a new chat session"""
     try:
         payload = {"title": title} if title else {}
-        response = requests.post(f"{API_BASE}/chat/new", json=payload)
+        response = http.post(f"{API_BASE}/chat/new", data=_dumps(payload), headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        invalidate_api_cache()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error creating new chat: {str(e)}")
         return None
@@ -57,19 +120,89 @@ def create_new_chat(title=None):
 def get_chat_list(limit=20):
     """Get list of chat sessions"""
     try:
-        response = requests.get(f"{API_BASE}/chat/list", params={"limit": limit})
-        response.raise_for_status()
-        return response.json()
+        return cached_get("/chat/list", {"limit": limit})
     except Exception as e:
         st.error(f"Error getting chat list: {str(e)}")
         return None
 
-def get_chat_history(chat_id):
-    """Get chat history for a specific chat"""
+class ChatLog:
+    """One chat's newest messages stored column-wise, capped at MAX_SESSION_MESSAGES
+    
+    Parallel role/content/metadata lists let rendering zip three lists instead
+    of doing several dict lookups per message on every rerun.
+    """
+    
+    __slots__ = ("roles", "contents", "metas")
+    
+    def __init__(self, messages=()):
+        messages = list(messages)[-MAX_SESSION_MESSAGES:]
+        self.roles = [message.get("role", "user") for message in messages]
+        self.contents = [message.get("content", "") for message in messages]
+        self.metas = [message.get("metadata") for message in messages]
+    
+    def __len__(self):
+        return len(self.roles)
+    
+    def __iter__(self):
+        return zip(self.roles, self.contents, self.metas)
+    
+    def append(self, role, content, metadata=None):
+        self.roles.append(role)
+        self.contents.append(content)
+        self.metas.append(metadata)
+        if len(self.roles) > MAX_SESSION_MESSAGES:
+            del self.roles[0], self.contents[0], self.metas[0]
+
+def _store_recent_page(chat_id, chat_history):
+    """Keep a chat's newest history page in the session, remembering where older pages start"""
+    messages = chat_history["chat"]["messages"]
+    st.session_state.chat_messages[chat_id] = ChatLog(messages)
+    st.session_state.history_start[chat_id] = chat_history["pagination"]["start"]
+    st.session_state.earlier_messages.pop(chat_id, None)
+
+def prefetch_chat_histories(chat_ids):
+    """Load the newest page of several not-yet-loaded chats with one batch request
+    
+    Each chat is tried once per session, so a chat that fails to load is not
+    requested again on every rerun; clicking it still loads it directly.
+    """
+    attempted = st.session_state.setdefault("prefetch_attempted", set())
+    missing = [
+        chat_id for chat_id in chat_ids
+        if chat_id not in st.session_state.chat_messages and chat_id not in attempted
+    ]
+    if not missing:
+        return
+    attempted.update(missing)
+    
+    payload = {"operations": [
+        {"op": "chat.get", "params": {"chat_id": chat_id, "limit": MAX_SESSION_MESSAGES}, "id": chat_id}
+        for chat_id in missing
+    ]}
+    try:
+        response = http.post(f"{API_BASE}/batch", data=_dumps(payload), headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        results = _loads(response.content).get("results", {})
+    except Exception:
+        # Prefetching is best effort; a click still loads the chat directly
+        return
+    
+    for chat_id in missing:
+        result = results.get(chat_id) or {}
+        if result.get("success"):
+            _store_recent_page(chat_id, result["data"])
+
+def get_chat_history(chat_id, limit=None, before=None):
+    """Get chat history for a specific chat, optionally one page of it"""
+    params = {}
+    if limit is not None:
+        params["limit"] = limit
+    if before is not None:
+        params["before"] = before
     try:
-        response = requests.get(f"{API_BASE}/chat/{chat_id}")
+        response = http.get(f"{API_BASE}/chat/{chat_id}", params=params or None, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error getting chat history: {str(e)}")
         return None
@@ -81,19 +214,60 @@ def send_message_to_chat(chat_id, message, document_id=None):
             "message": message,
             "document_id": document_id
         }
-        response = requests.post(f"{API_BASE}/chat/{chat_id}/message", json=payload)
+        response = http.post(f"{API_BASE}/chat/{chat_id}/message", data=_dumps(payload), headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        invalidate_api_cache()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error sending message to chat: {str(e)}")
         return None
 
+def stream_message_to_chat(chat_id, message, document_id=None, result=None):
+    """Yield reply text as it streams from the chat WebSocket
+    
+    The final response fields (same shape as send_message_to_chat) are
+    stored in ``result["response"]``. Falls back to a single HTTP request
+    when the websockets package is missing or the socket cannot connect.
+    """
+    result = result if result is not None else {}
+    
+    if ws_connect is not None:
+        streamed = False
+        try:
+            with ws_connect(f"{WS_BASE}/chat/{chat_id}/ws") as websocket:
+                # The server reads text frames, so send str rather than bytes
+                websocket.send(_dumps({"message": message, "document_id": document_id}).decode("utf-8"))
+                for frame in websocket:
+                    event = _loads(frame)
+                    if event["type"] == "token":
+                        streamed = True
+                        yield event["content"]
+                        continue
+                    
+                    if event["type"] == "error":
+                        st.error(f"Error sending message to chat: {event.get('error')}")
+                    else:
+                        invalidate_api_cache()
+                    result["response"] = event
+                    return
+        except Exception as e:
+            # Once tokens have been shown, retrying over HTTP would duplicate the reply
+            if streamed:
+                st.error(f"Error streaming response: {str(e)}")
+                return
+    
+    response = send_message_to_chat(chat_id, message, document_id)
+    result["response"] = response
+    if response and response.get("success"):
+        yield response["response"]
+
 def update_chat_title(chat_id, title):
     """Update chat title"""
     try:
-        response = requests.put(f"{API_BASE}/chat/{chat_id}/title", params={"title": title})
+        response = http.put(f"{API_BASE}/chat/{chat_id}/title", params={"title": title}, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        invalidate_api_cache()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error updating chat title: {str(e)}")
         return None
@@ -101,9 +275,10 @@ def update_chat_title(chat_id, title):
 def delete_chat(chat_id):
     """Delete a chat session"""
     try:
-        response = requests.delete(f"{API_BASE}/chat/{chat_id}")
+        response = http.delete(f"{API_BASE}/chat/{chat_id}", timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        invalidate_api_cache()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error deleting chat: {str(e)}")
         return None
@@ -111,9 +286,7 @@ def delete_chat(chat_id):
 def search_chats(query, limit=10):
     """Search chats by content"""
     try:
-        response = requests.get(f"{API_BASE}/chats/search", params={"query": query, "limit": limit})
-        response.raise_for_status()
-        return response.json()
+        return cached_get("/chats/search", {"query": query, "limit": limit})
     except Exception as e:
         st.error(f"Error searching chats: {str(e)}")
         return None
@@ -121,9 +294,9 @@ def search_chats(query, limit=10):
 def get_chat_suggestions(chat_id):
     """Get chat suggestions"""
     try:
-        response = requests.get(f"{API_BASE}/chat/{chat_id}/suggestions")
+        response = http.get(f"{API_BASE}/chat/{chat_id}/suggestions", timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error getting chat suggestions: {str(e)}")
         return None
@@ -134,9 +307,10 @@ def upload_document(file, custom_name=None):
         files = {"file": (file.name, file, file.type)}
         data = {"custom_name": custom_name} if custom_name else {}
         
-        response = requests.post(f"{API_BASE}/upload", files=files, data=data)
+        response = http.post(f"{API_BASE}/upload", files=files, data=data, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        invalidate_api_cache()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error uploading file: {str(e)}")
         return None
@@ -144,9 +318,7 @@ def upload_document(file, custom_name=None):
 def get_documents():
     """Get list of uploaded documents"""
     try:
-        response = requests.get(f"{API_BASE}/documents")
-        response.raise_for_status()
-        return response.json()
+        return cached_get("/documents")
     except Exception as e:
         st.error(f"Error retrieving documents: {str(e)}")
         return []
@@ -159,9 +331,9 @@ def search_documents(query, document_id=None, limit=10):
             "document_id": document_id,
             "limit": limit
         }
-        response = requests.post(f"{API_BASE}/search", json=payload)
+        response = http.post(f"{API_BASE}/search", data=_dumps(payload), headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error searching documents: {str(e)}")
         return None
@@ -170,9 +342,9 @@ def get_business_insights(query=None):
     """Get business insights"""
     try:
         payload = {"query": query} if query else {}
-        response = requests.post(f"{API_BASE}/analyze/business", json=payload)
+        response = http.post(f"{API_BASE}/analyze/business", data=_dumps(payload), headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
     except Exception as e:
         st.error(f"Error getting business insights: {str(e)}")
         return None
@@ -180,13 +352,39 @@ def get_business_insights(query=None):
 def get_system_stats():
     """Get system statistics"""
     try:
-        response = requests.get(f"{API_BASE}/stats")
-        response.raise_for_status()
-        return response.json()
+        return cached_get("/stats")
     except Exception as e:
         st.error(f"Error getting system stats: {str(e)}")
         return None
 
+def fetch_sidebar_data():
+    """Fetch the chat list and documents concurrently"""
+    ctx = get_script_run_ctx()
+    
+    def run(func, *args):
+        # Attach the script context so st.error calls from worker threads still render
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args)
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        chat_list_future = executor.submit(run, get_chat_list, 50)
+        documents_future = executor.submit(run, get_documents)
+        
+        return chat_list_future.result(), documents_future.result()
+
+def filter_chats(chats, query):
+    """Filter the already-fetched chat list by title and last-message preview"""
+    query = query.lower()
+    return [
+        chat for chat in chats
+        if query in chat.get("title", "").lower() or query in (chat.get("last_message") or "").lower()
+    ]
+
+def merge_chats(chats, more_chats):
+    """Append the chats from more_chats that are not already listed"""
+    listed = {chat.get("chat_id") for chat in chats}
+    return chats + [chat for chat in more_chats if chat.get("chat_id") not in listed]
+
 def main():
     """Main Streamlit application"""
     
@@ -198,6 +396,9 @@ def main():
     if not check_api_health():
         st.error("⚠️ API server is not running. Please start the FastAPI server first.")
         st.code("python main.py")
+        if st.button("🔄 Check again"):
+            check_api_health.clear()
+            st.rerun()
         return
     
     # Sidebar navigation (Fixed - removed Simple Chat and Documents)
@@ -214,6 +415,134 @@ def main():
     elif page == "📊 System Stats":
         stats_page()
 
+def suggestion_key(suggestion):
+    """Widget key derived from the suggestion text so a button keeps its identity when the list changes"""
+    return f"sugg_{hashlib.blake2b(suggestion.encode('utf-8'), digest_size=8).hexdigest()}"
+
+QUICK_START_PRESETS = [
+    ("💼 Business Analysis Chat", "Business Analysis"),
+    ("📚 Document Q&A Chat", "Document Q&A"),
+    ("🎯 General Purpose Chat", "General Chat"),
+]
+
+def _start_chat(preset):
+    """Create a chat titled after a quick-start preset and make it current"""
+    result = create_new_chat(preset)
+    if result and result.get("success"):
+        st.session_state.current_chat_id = result["chat_id"]
+        st.session_state.chat_messages[result["chat_id"]] = ChatLog()
+
+def fragment(func):
+    """Run func as a Streamlit fragment when the installed version supports it"""
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return decorator(func) if decorator else func
+
+@fragment
+def chat_pane(current_chat_id):
+    """Render a chat's messages and input; chatting reruns only this pane, not the sidebar"""
+    # Display current chat messages
+    current_messages = st.session_state.chat_messages.get(current_chat_id) or ChatLog()
+    
+    # Older messages stay on the server until explicitly requested
+    history_start = st.session_state.history_start.get(current_chat_id, 0)
+    if history_start > 0 and st.button("⬆️ Load earlier messages", key="load_earlier"):
+        older = get_chat_history(current_chat_id, limit=MAX_SESSION_MESSAGES, before=history_start)
+        if older and older.get("success"):
+            st.session_state.earlier_messages[current_chat_id] = (
+                older["chat"]["messages"] + st.session_state.earlier_messages.get(current_chat_id, [])
+            )
+            st.session_state.history_start[current_chat_id] = older["pagination"]["start"]
+    
+    earlier_messages = st.session_state.earlier_messages.get(current_chat_id, [])
+    if earlier_messages:
+        with st.expander(f"🕘 Earlier messages ({len(earlier_messages)})"):
+            for message in earlier_messages:
+                with st.chat_message(message.get("role", "user")):
+                    st.markdown(message.get("content", ""))
+    
+    # Create a container for messages
+    message_container = st.container()
+    
+    with message_container:
+        for role, content, metadata in current_messages:
+            with st.chat_message(role):
+                st.markdown(content)
+                
+                # Show metadata for assistant messages (Fixed the error)
+                if role == "assistant" and metadata is not None:
+                    context_docs = metadata.get("context_documents", [])
+                    # Fix: Ensure context_documents is a list before joining
+                    if isinstance(context_docs, list) and context_docs:
+                        st.caption(f"📄 Used documents: {', '.join(context_docs)}")
+                    elif context_docs:  # If it's a string or other type
+                        st.caption(f"📄 Used documents: {context_docs}")
+                    
+                    response_type = metadata.get("response_type", "general")
+                    if response_type != "general":
+                        st.caption(f"🏷️ Response type: {response_type}")
+    
+    # Chat input
+    if prompt := st.chat_input("Ask me anything..."):
+        # Add user message to display
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        
+        # Update session state
+        if current_chat_id not in st.session_state.chat_messages:
+            st.session_state.chat_messages[current_chat_id] = ChatLog()
+        
+        st.session_state.chat_messages[current_chat_id].append("user", prompt)
+        
+        # Get AI response
+        with st.chat_message("assistant"):
+            # Render tokens as they arrive instead of waiting for the whole reply
+            stream_result = {}
+            st.write_stream(stream_message_to_chat(
+                current_chat_id,
+                prompt,
+                st.session_state.selected_document,
+                stream_result
+            ))
+            response = stream_result.get("response")
+            
+            if response and response.get("success"):
+                ai_response = response["response"]
+                
+                # Show context information (Fixed the error)
+                context_docs = response.get("context_documents", [])
+                if isinstance(context_docs, list) and context_docs:
+                    st.caption(f"📄 Used documents: {', '.join(context_docs)}")
+                elif context_docs:  # If it's a string or other type
+                    st.caption(f"📄 Used documents: {context_docs}")
+                
+                response_type = response.get("response_type", "general")
+                if response_type != "general":
+                    st.caption(f"🏷️ Response type: {response_type}")
+                
+                # Show suggestions
+                suggestions = response.get("suggestions", [])
+                if suggestions:
+                    st.subheader("💡 Suggested Questions:")
+                    for suggestion in list(dict.fromkeys(suggestions))[:3]:  # Show top 3
+                        if st.button(suggestion, key=suggestion_key(suggestion)):
+                            # Auto-fill the suggestion
+                            st.session_state.suggestion_clicked = suggestion
+                
+                # Add assistant message to session state (Fixed metadata structure)
+                st.session_state.chat_messages[current_chat_id].append("assistant", ai_response, {
+                    "context_documents": context_docs,
+                    "response_type": response_type,
+                    "timestamp": response.get("timestamp")
+                })
+            else:
+                st.error("Failed to get response from AI assistant")
+    
+    # Handle suggestion clicks
+    if hasattr(st.session_state, 'suggestion_clicked'):
+        st.text_input("Suggested question:", value=st.session_state.suggestion_clicked, key="suggestion_input")
+        del st.session_state.suggestion_clicked
+
+
 def enhanced_chat_page():
     """Enhanced chat interface with session management"""
     st.header("💬 Enhanced Chat with Session Management")
@@ -223,6 +552,10 @@ def enhanced_chat_page():
         st.session_state.current_chat_id = None
     if "chat_messages" not in st.session_state:
         st.session_state.chat_messages = {}
+    if "history_start" not in st.session_state:
+        st.session_state.history_start = {}
+    if "earlier_messages" not in st.session_state:
+        st.session_state.earlier_messages = {}
     if "selected_document" not in st.session_state:
         st.session_state.selected_document = None
     
@@ -237,7 +570,7 @@ def enhanced_chat_page():
                 result = create_new_chat(new_chat_title if new_chat_title else None)
                 if result and result.get("success"):
                     st.session_state.current_chat_id = result["chat_id"]
-                    st.session_state.chat_messages[result["chat_id"]] = []
+                    st.session_state.chat_messages[result["chat_id"]] = ChatLog()
                     st.success(f"Created new chat: {result['title']}")
                     st.rerun()
         
@@ -256,19 +589,22 @@ def enhanced_chat_page():
                     st.success(f"Document uploaded successfully!")
                     st.info(f"Created {result.get('chunks_created', 0)} chunks")
         
-        # Chat history
+        # Chat history and documents are fetched in parallel
         st.subheader("📜 Chat History")
-        chat_list_data = get_chat_list(limit=50)
+        chat_list_data, documents = fetch_sidebar_data()
         
         if chat_list_data and chat_list_data.get("success"):
             chats = chat_list_data.get("chats", [])
+            prefetch_chat_histories([chat.get("chat_id") for chat in chats[:PREFETCH_CHATS]])
             
             # Search chats
             search_query = st.text_input("🔍 Search chats...", key="chat_search")
             if search_query:
+                chats = filter_chats(chats, search_query)
+                # Message bodies are only searchable server-side, so the API's matches are always merged in
                 search_results = search_chats(search_query)
                 if search_results and search_results.get("success"):
-                    chats = search_results.get("results", [])
+                    chats = merge_chats(chats, search_results.get("results", []))
             
             # Display chats
             for chat in chats[:20]:  # Limit to 20 for performance
@@ -276,60 +612,49 @@ def enhanced_chat_page():
                 title = chat.get("title", f"Chat {chat_id[:8]}")
                 message_count = chat.get("message_count", 0)
                 
-                # Chat selection button
-                if st.button(
-                    f"💬 {title} ({message_count} msgs)", 
-                    key=f"chat_{chat_id}",
-                    help=f"Created: {chat.get('created_at', 'Unknown')}"
-                ):
-                    st.session_state.current_chat_id = chat_id
-                    # Load chat history
-                    chat_history = get_chat_history(chat_id)
-                    if chat_history and chat_history.get("success"):
-                        messages = chat_history["chat"]["messages"]
-                        st.session_state.chat_messages[chat_id] = messages
-                    st.rerun()
+                # One form per chat row: picking an action reruns nothing until Go is pressed
+                with st.form(key=f"row_{chat_id}", clear_on_submit=True, border=False):
+                    st.markdown(f"💬 **{title}** ({message_count} msgs)")
+                    st.caption(f"Created: {chat.get('created_at', 'Unknown')}")
+                    action = st.radio(
+                        "Action",
+                        ["Open", "Rename", "Delete"],
+                        horizontal=True,
+                        label_visibility="collapsed",
+                        key=f"action_{chat_id}"
+                    )
+                    new_title = st.text_input(
+                        "New title:",
+                        value=title,
+                        label_visibility="collapsed",
+                        key=f"title_{chat_id}"
+                    )
+                    submitted = st.form_submit_button("Go")
                 
-                # Chat management buttons
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("🗑️", key=f"del_{chat_id}", help="Delete chat"):
+                if submitted:
+                    if action == "Open":
+                        st.session_state.current_chat_id = chat_id
+                        # Load the newest page of chat history unless it was prefetched
+                        if chat_id not in st.session_state.chat_messages:
+                            chat_history = get_chat_history(chat_id, limit=MAX_SESSION_MESSAGES)
+                            if chat_history and chat_history.get("success"):
+                                _store_recent_page(chat_id, chat_history)
+                        st.rerun()
+                    elif action == "Rename":
+                        if update_chat_title(chat_id, new_title):
+                            st.success("Title updated!")
+                            st.rerun()
+                    elif action == "Delete":
                         if delete_chat(chat_id):
                             st.success("Chat deleted!")
                             if st.session_state.current_chat_id == chat_id:
                                 st.session_state.current_chat_id = None
                             st.rerun()
-                
-                with col2:
-                    if st.button("✏️", key=f"edit_{chat_id}", help="Edit title"):
-                        st.session_state[f"editing_{chat_id}"] = True
-                
-                # Title editing
-                if st.session_state.get(f"editing_{chat_id}", False):
-                    new_title = st.text_input(
-                        "New title:", 
-                        value=title,
-                        key=f"title_{chat_id}"
-                    )
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("✅", key=f"save_{chat_id}"):
-                            if update_chat_title(chat_id, new_title):
-                                st.success("Title updated!")
-                                st.session_state[f"editing_{chat_id}"] = False
-                                st.rerun()
-                    with col2:
-                        if st.button("❌", key=f"cancel_{chat_id}"):
-                            st.session_state[f"editing_{chat_id}"] = False
-                            st.rerun()
         
         # Document selection for context
         st.subheader("📄 Document Context")
-        documents = get_documents()
         if documents:
-            doc_options = {"None": None}
-            for doc in documents:
-                doc_options[f"{doc['filename']} ({doc['type']})"] = doc['document_id']
+            doc_options = _doc_options(tuple((doc['filename'], doc['type'], doc['document_id']) for doc in documents))
             
             selected_doc_name = st.selectbox(
                 "Select document for context:",
@@ -342,130 +667,16 @@ def enhanced_chat_page():
     if st.session_state.current_chat_id:
         st.subheader(f"Current Chat: {st.session_state.current_chat_id[:8]}...")
         
-        # Display current chat messages
-        current_messages = st.session_state.chat_messages.get(st.session_state.current_chat_id, [])
-        
-        # Create a container for messages
-        message_container = st.container()
-        
-        with message_container:
-            for message in current_messages:
-                role = message.get("role", "user")
-                content = message.get("content", "")
-                
-                with st.chat_message(role):
-                    st.markdown(content)
-                    
-                    # Show metadata for assistant messages (Fixed the error)
-                    if role == "assistant" and "metadata" in message:
-                        metadata = message["metadata"]
-                        context_docs = metadata.get("context_documents", [])
-                        # Fix: Ensure context_documents is a list before joining
-                        if isinstance(context_docs, list) and context_docs:
-                            st.caption(f"📄 Used documents: {', '.join(context_docs)}")
-                        elif context_docs:  # If it's a string or other type
-                            st.caption(f"📄 Used documents: {context_docs}")
-                        
-                        response_type = metadata.get("response_type", "general")
-                        if response_type != "general":
-                            st.caption(f"🏷️ Response type: {response_type}")
-        
-        # Chat input
-        if prompt := st.chat_input("Ask me anything..."):
-            # Add user message to display
-            with st.chat_message("user"):
-                st.markdown(prompt)
-            
-            # Update session state
-            if st.session_state.current_chat_id not in st.session_state.chat_messages:
-                st.session_state.chat_messages[st.session_state.current_chat_id] = []
-            
-            st.session_state.chat_messages[st.session_state.current_chat_id].append({
-                "role": "user",
-                "content": prompt
-            })
-            
-            # Get AI response
-            with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    response = send_message_to_chat(
-                        st.session_state.current_chat_id,
-                        prompt,
-                        st.session_state.selected_document
-                    )
-                    
-                    if response and response.get("success"):
-                        ai_response = response["response"]
-                        st.markdown(ai_response)
-                        
-                        # Show context information (Fixed the error)
-                        context_docs = response.get("context_documents", [])
-                        if isinstance(context_docs, list) and context_docs:
-                            st.caption(f"📄 Used documents: {', '.join(context_docs)}")
-                        elif context_docs:  # If it's a string or other type
-                            st.caption(f"📄 Used documents: {context_docs}")
-                        
-                        response_type = response.get("response_type", "general")
-                        if response_type != "general":
-                            st.caption(f"🏷️ Response type: {response_type}")
-                        
-                        # Show suggestions
-                        suggestions = response.get("suggestions", [])
-                        if suggestions:
-                            st.subheader("💡 Suggested Questions:")
-                            for i, suggestion in enumerate(suggestions[:3]):  # Show top 3
-                                if st.button(suggestion, key=f"suggestion_{i}"):
-                                    # Auto-fill the suggestion
-                                    st.session_state.suggestion_clicked = suggestion
-                        
-                        # Add assistant message to session state (Fixed metadata structure)
-                        st.session_state.chat_messages[st.session_state.current_chat_id].append({
-                            "role": "assistant",
-                            "content": ai_response,
-                            "metadata": {
-                                "context_documents": context_docs,
-                                "response_type": response_type,
-                                "timestamp": response.get("timestamp")
-                            }
-                        })
-                    else:
-                        st.error("Failed to get response from AI assistant")
-        
-        # Handle suggestion clicks
-        if hasattr(st.session_state, 'suggestion_clicked'):
-            st.text_input("Suggested question:", value=st.session_state.suggestion_clicked, key="suggestion_input")
-            del st.session_state.suggestion_clicked
+        chat_pane(st.session_state.current_chat_id)
     
     else:
         st.info("👈 Create a new chat or select an existing one from the sidebar to start chatting!")
         
         # Quick start options
         st.subheader("🚀 Quick Start")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("💼 Business Analysis Chat"):
-                result = create_new_chat("Business Analysis")
-                if result and result.get("success"):
-                    st.session_state.current_chat_id = result["chat_id"]
-                    st.session_state.chat_messages[result["chat_id"]] = []
-                    st.rerun()
-        
-        with col2:
-            if st.button("📚 Document Q&A Chat"):
-                result = create_new_chat("Document Q&A")
-                if result and result.get("success"):
-                    st.session_state.current_chat_id = result["chat_id"]
-                    st.session_state.chat_messages[result["chat_id"]] = []
-                    st.rerun()
-        
-        with col3:
-            if st.button("🎯 General Purpose Chat"):
-                result = create_new_chat("General Chat")
-                if result and result.get("success"):
-                    st.session_state.current_chat_id = result["chat_id"]
-                    st.session_state.chat_messages[result["chat_id"]] = []
-                    st.rerun()
+        # Callbacks run before the rerun the click already triggers, so no st.rerun() is needed
+        for col, (label, preset) in zip(st.columns(len(QUICK_START_PRESETS)), QUICK_START_PRESETS):
+            col.button(label, on_click=_start_chat, args=(preset,))
 
 def business_page():
     """Business analysis page"""
@@ -1,13 +1,112 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
+import hashlib
 import json
+import os
+import re
 from datetime import datetime, timedelta
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+from config.settings import settings
+from utils.dataframe_readers import open_excel, read_csv, read_excel
+
 logger = logging.getLogger(__name__)
 
+# Rows read at upload to detect financial columns; the columns themselves load on first use
+DETECTION_ROWS = 200
+
+# CSV columns are kept as Arrow arrays: strings in contiguous buffers, reductions in Arrow kernels
+CSV_DTYPE_BACKEND = 'pyarrow'
+
+# Column-name patterns used to detect financial columns in a single vectorized pass
+AMOUNT_COLUMN_RE = re.compile(r'amount|cost|price|total|value|expense|revenue|sales')
+DATE_COLUMN_RE = re.compile(r'date|time|created|transaction|when')
+DESCRIPTION_COLUMN_RE = re.compile(r'description|desc|item|product|service|note|memo')
+CATEGORY_COLUMN_RE = re.compile(r'category|type|class|group|department')
+
+def _parquet_cache_path(file_path: str, mtime_ns: int, size: int, sheet_name, columns: tuple,
+                        narrow_columns: tuple, categorical_columns: tuple) -> Path:
+    """Parquet cache location for a column selection, keyed on the source file's identity and mtime"""
+    key = json.dumps(
+        [os.path.abspath(file_path), mtime_ns, size, sheet_name, list(columns), list(narrow_columns), list(categorical_columns)],
+        default=str
+    )
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return Path(settings.ANALYSIS_CACHE_FOLDER) / f"{digest}.parquet"
+
+def _to_amount_buffer(df: pd.DataFrame, column: str) -> None:
+    """Store a numeric column as a plain NumPy float buffer, float32 when that loses nothing"""
+    values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+    narrowed = values.astype(np.float32)
+    df[column] = narrowed if np.array_equal(narrowed, values, equal_nan=True) else values
+
+@lru_cache(maxsize=16)
+def _load_columns(file_path: str, mtime_ns: int, size: int, file_type: str, sheet_name, columns: tuple,
+                  narrow_columns: tuple = (), categorical_columns: tuple = ()) -> pd.DataFrame:
+    """Read only the given columns of an uploaded spreadsheet, cached in memory and as Parquet
+    
+    mtime_ns and size are part of the cache key, so a replaced or re-uploaded
+    file under the same name is read again rather than served from memory.
+    
+    Columns in narrow_columns become NumPy float buffers, float32 where exact,
+    halving the bytes later reductions read. Columns in categorical_columns
+    keep each distinct text once, with small integer codes per row.
+    """
+    cache_path = _parquet_cache_path(file_path, mtime_ns, size, sheet_name, columns, narrow_columns, categorical_columns)
+    if cache_path.exists():
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Parquet cache {cache_path}: {str(e)}")
+    
+    if file_type == 'excel':
+        df = read_excel(file_path, sheet_name=sheet_name, usecols=list(columns))
+    else:
+        df = read_csv(file_path, usecols=list(columns), dtype_backend=CSV_DTYPE_BACKEND)
+    
+    for column in narrow_columns:
+        _to_amount_buffer(df, column)
+    for column in categorical_columns:
+        df[column] = df[column].astype('category')
+    
+    # Write to a temporary name first so readers never see a partial file
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = cache_path.with_suffix('.part')
+        df.to_parquet(part_path, compression='zstd')
+        os.replace(part_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Could not cache {file_path} as Parquet: {str(e)}")
+    
+    return df
+
+def _widen(amounts: pd.Series) -> pd.Series:
+    """float64 view of a possibly narrowed amount column, for sums that pandas accumulates in the input dtype"""
+    return amounts.astype(np.float64) if amounts.dtype == np.float32 else amounts
+
+def _amount_summary(amounts: pd.Series) -> Dict[str, float]:
+    """Sum, mean, max, min and count of the non-missing values in an amount column"""
+    # float32 columns are read as-is and only the running sum is widened to float64
+    dtype = np.float32 if amounts.dtype == np.float32 else np.float64
+    values = amounts.to_numpy(dtype=dtype, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    count = values.size
+    if count == 0:
+        return {'sum': 0.0, 'mean': np.nan, 'max': np.nan, 'min': np.nan, 'count': 0}
+    
+    total = float(values.sum(dtype=np.float64))
+    return {
+        'sum': total,
+        'mean': total / count,  # derived from the sum instead of another pass
+        'max': float(values.max()),
+        'min': float(values.min()),
+        'count': count
+    }
+
 class BusinessAnalyzer:
     """Analyze business and financial data from uploaded documents"""
     
@@ -23,13 +122,19 @@ class BusinessAnalyzer:
             'software': ['software', 'subscription', 'saas', 'license', 'app'],
             'miscellaneous': []
         }
+        # One alternation per category so a whole column is matched per category, not per row
+        self._category_patterns = [
+            (category, re.compile('|'.join(map(re.escape, keywords))))
+            for category, keywords in self.expense_categories.items()
+            if keywords
+        ]
     
     def add_document_data(self, file_path: str, doc_data: Dict[str, Any]) -> bool:
         """Add financial data from a processed document"""
         try:
             if doc_data['type'] in ['excel', 'csv']:
-                # Try to extract financial data
-                df = self._load_dataframe(file_path, doc_data['type'])
+                # Detect financial columns from a sample; full data is read only when analyzed
+                sheet_name, df = self._load_sample(file_path, doc_data['type'])
                 
                 if df is not None and not df.empty:
                     # Detect financial columns
@@ -38,7 +143,8 @@ class BusinessAnalyzer:
                     if financial_info:
                         document_id = doc_data['filename']
                         self.financial_data[document_id] = {
-                            'dataframe': df,
+                            'file_path': str(file_path),
+                            'sheet_name': sheet_name,
                             'financial_columns': financial_info,
                             'upload_date': datetime.now().isoformat(),
                             'type': doc_data['type']
@@ -53,62 +159,72 @@ class BusinessAnalyzer:
             logger.error(f"Error adding document data: {str(e)}")
             return False
     
-    def _load_dataframe(self, file_path: str, file_type: str) -> Optional[pd.DataFrame]:
-        """Load dataframe from file"""
+    def _load_sample(self, file_path: str, file_type: str):
+        """Load the leading rows of the first sheet with data, returning (sheet_name, dataframe)"""
         try:
             if file_type == 'excel':
-                # Try to read the first sheet that has data
-                excel_data = pd.read_excel(file_path, sheet_name=None)
-                for sheet_name, df in excel_data.items():
-                    if not df.empty and len(df.columns) > 1:
-                        return df
+                # Parse sheets one at a time, stopping at the first that has data
+                with open_excel(file_path) as workbook:
+                    for sheet_name in workbook.sheet_names:
+                        df = workbook.parse(sheet_name, nrows=DETECTION_ROWS)
+                        if not df.empty and len(df.columns) > 1:
+                            return sheet_name, df
             elif file_type == 'csv':
-                return pd.read_csv(file_path)
+                return None, read_csv(file_path, nrows=DETECTION_ROWS, dtype_backend=CSV_DTYPE_BACKEND)
             
-            return None
+            return None, None
             
         except Exception as e:
             logger.error(f"Error loading dataframe from {file_path}: {str(e)}")
-            return None
+            return None, None
+    
+    def _parse_dates(self, data: Dict[str, Any], df: pd.DataFrame, date_col: str) -> pd.Series:
+        """Parse a document's date column once and keep the result with the document's data"""
+        parsed_dates = data.setdefault('parsed_dates', {})
+        if date_col not in parsed_dates:
+            parsed_dates[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+        return parsed_dates[date_col]
+    
+    def _amount_summary_for(self, data: Dict[str, Any], amount_col: str) -> Dict[str, float]:
+        """Summarize a document's amount column once and keep the result with the document's data"""
+        summaries = data.setdefault('amount_summaries', {})
+        if amount_col not in summaries:
+            summaries[amount_col] = _amount_summary(self._get_dataframe(data)[amount_col])
+        return summaries[amount_col]
+    
+    def _get_dataframe(self, data: Dict[str, Any]) -> pd.DataFrame:
+        """Materialize the detected financial columns of a stored document"""
+        columns = tuple(dict.fromkeys(
+            column for columns in data['financial_columns'].values() for column in columns
+        ))
+        amount_columns = tuple(data['financial_columns'].get('amount', ()))
+        # Text columns become categoricals; amount and date columns keep their own representation
+        text_columns = tuple(
+            column
+            for kind in ('description', 'category')
+            for column in data['financial_columns'].get(kind, ())
+            if column not in amount_columns and column not in data['financial_columns'].get('date', ())
+        )
+        stat = os.stat(data['file_path'])
+        return _load_columns(
+            data['file_path'], stat.st_mtime_ns, stat.st_size, data['type'], data['sheet_name'],
+            columns, amount_columns, tuple(dict.fromkeys(text_columns))
+        )
     
     def _detect_financial_columns(self, df: pd.DataFrame) -> Dict[str, List[str]]:
         """Detect columns that contain financial data"""
+        # Match all column names against each pattern at once
+        columns_lower = df.columns.astype(str).str.lower()
+        numeric_mask = df.dtypes.map(pd.api.types.is_numeric_dtype).to_numpy(dtype=bool)
+        
         financial_columns = {
-            'amount': [],
-            'date': [],
-            'description': [],
-            'category': []
+            # Amount columns must also contain numeric data
+            'amount': df.columns[columns_lower.str.contains(AMOUNT_COLUMN_RE) & numeric_mask].tolist(),
+            'date': df.columns[columns_lower.str.contains(DATE_COLUMN_RE)].tolist(),
+            'description': df.columns[columns_lower.str.contains(DESCRIPTION_COLUMN_RE)].tolist(),
+            'category': df.columns[columns_lower.str.contains(CATEGORY_COLUMN_RE)].tolist()
         }
         
-        # Convert column names to lowercase for matching
-        columns_lower = [col.lower() for col in df.columns]
-        
-        # Detect amount columns
-        amount_keywords = ['amount', 'cost', 'price', 'total', 'value', 'expense', 'revenue', 'sales']
-        for i, col in enumerate(columns_lower):
-            if any(keyword in col for keyword in amount_keywords):
-                # Check if column contains numeric data
-                if pd.api.types.is_numeric_dtype(df.iloc[:, i]):
-                    financial_columns['amount'].append(df.columns[i])
-        
-        # Detect date columns
-        date_keywords = ['date', 'time', 'created', 'transaction', 'when']
-        for i, col in enumerate(columns_lower):
-            if any(keyword in col for keyword in date_keywords):
-                financial_columns['date'].append(df.columns[i])
-        
-        # Detect description columns
-        desc_keywords = ['description', 'desc', 'item', 'product', 'service', 'note', 'memo']
-        for i, col in enumerate(columns_lower):
-            if any(keyword in col for keyword in desc_keywords):
-                financial_columns['description'].append(df.columns[i])
-        
-        # Detect category columns
-        cat_keywords = ['category', 'type', 'class', 'group', 'department']
-        for i, col in enumerate(columns_lower):
-            if any(keyword in col for keyword in cat_keywords):
-                financial_columns['category'].append(df.columns[i])
-        
         # Remove empty lists
         return {k: v for k, v in financial_columns.items() if v}
     
@@ -116,12 +232,117 @@ class BusinessAnalyzer:
         """Automatically categorize an expense based on description"""
         description_lower = description.lower()
         
-        for category, keywords in self.expense_categories.items():
-            if any(keyword in description_lower for keyword in keywords):
+        # One precompiled alternation per category, checked in priority order
+        for category, pattern in self._category_patterns:
+            if pattern.search(description_lower):
                 return category
         
         return 'miscellaneous'
     
+    def categorize_descriptions(self, descriptions: pd.Series) -> pd.Series:
+        """Vectorized categorize_expenses over a column of descriptions
+        
+        Each distinct description is matched once. Categories are tried in
+        priority order, each as one regex pass over only the descriptions no
+        earlier category claimed.
+        """
+        # Deduplicate before any string work, so only distinct descriptions are lowercased
+        if isinstance(descriptions.dtype, pd.CategoricalDtype):
+            # Already deduplicated; missing values (code -1) get a trailing 'nan' entry as astype(str) would give
+            categories = descriptions.cat.categories
+            codes = descriptions.cat.codes.to_numpy()
+            codes = np.where(codes < 0, len(categories), codes)
+            uniques = [*categories.astype(str), 'nan']
+        else:
+            codes, uniques = pd.factorize(descriptions.astype(str))
+        remaining = pd.Series(uniques, dtype=object).str.lower()
+        
+        # Result is categorical with int8 codes, so grouping on it hashes small ints, not strings
+        category_names = list(self.expense_categories)
+        category_codes = np.full(len(remaining), category_names.index('miscellaneous'), dtype=np.int8)
+        for category, pattern in self._category_patterns:
+            if remaining.empty:
+                break
+            hits = remaining.str.contains(pattern).to_numpy(dtype=bool)
+            category_codes[remaining.index[hits]] = category_names.index(category)
+            remaining = remaining[~hits]
+        
+        return pd.Series(
+            pd.Categorical.from_codes(category_codes[codes], categories=category_names),
+            index=descriptions.index
+        )
+    
+    def _document_insights(self, doc_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute the insights for one stored document"""
+        df = self._get_dataframe(data)
+        financial_cols = data['financial_columns']
+        
+        # Basic statistics
+        doc_insights = {
+            'document': doc_id,
+            'insights': []
+        }
+        
+        # Amount analysis
+        if 'amount' in financial_cols:
+            for amount_col in financial_cols['amount']:
+                summary = self._amount_summary_for(data, amount_col)
+                if summary['count'] > 0:
+                    doc_insights['insights'].extend([
+                        f"Total {amount_col}: ${summary['sum']:,.2f}",
+                        f"Average {amount_col}: ${summary['mean']:.2f}",
+                        f"Highest {amount_col}: ${summary['max']:.2f}",
+                        f"Lowest {amount_col}: ${summary['min']:.2f}",
+                        f"Number of transactions: {summary['count']}"
+                    ])
+        
+        # Time-based analysis
+        if 'date' in financial_cols and 'amount' in financial_cols:
+            try:
+                date_col = financial_cols['date'][0]
+                amount_col = financial_cols['amount'][0]
+                
+                dates = self._parse_dates(data, df, date_col)
+                valid = dates.notna() & df[amount_col].notna()
+                
+                if valid.sum() > 1:
+                    dates = dates[valid]
+                    
+                    # Monthly trends: truncate to datetime64[M], sort once and sum each run of equal months
+                    if dates.dt.tz is not None:
+                        dates = dates.dt.tz_localize(None)
+                    months = dates.to_numpy(dtype='datetime64[M]')
+                    order = np.argsort(months, kind='stable')
+                    months = months[order]
+                    amounts = df.loc[valid, amount_col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+                    month_starts = np.r_[0, np.flatnonzero(np.diff(months)) + 1]
+                    if len(month_starts) > 1:
+                        monthly = np.add.reduceat(amounts, month_starts)
+                        trend = "increasing" if monthly[-1] > monthly[0] else "decreasing"
+                        doc_insights['insights'].append(f"Monthly trend: {trend}")
+            
+            except Exception as e:
+                logger.warning(f"Error in time analysis: {str(e)}")
+        
+        # Category analysis
+        if 'description' in financial_cols and 'amount' in financial_cols:
+            try:
+                desc_col = financial_cols['description'][0]
+                amount_col = financial_cols['amount'][0]
+                
+                # Auto-categorize expenses
+                categories = self.categorize_descriptions(df[desc_col])
+                category_totals = _widen(df[amount_col]).groupby(categories, observed=True).sum().sort_values(ascending=False)
+                
+                doc_insights['insights'].append("Top expense categories:")
+                for cat, total in category_totals.head(5).items():
+                    doc_insights['insights'].append(f"  • {cat.title()}: ${total:,.2f}")
+            
+            except Exception as e:
+                logger.warning(f"Error in category analysis: {str(e)}")
+        
+        return doc_insights
+    
     def generate_insights(self, query: str = None) -> Dict[str, Any]:
         """Generate business insights from available financial data"""
         try:
@@ -131,71 +352,18 @@ class BusinessAnalyzer:
                     'insights': []
                 }
             
-            insights = []
+            # Insights are kept with the document's data; re-adding the document starts fresh
+            pending = [(doc_id, data) for doc_id, data in self.financial_data.items() if 'insights' not in data]
+            if len(pending) > 1:
+                # Documents are independent and pandas/NumPy release the GIL, so analyze them in parallel
+                with ThreadPoolExecutor(max_workers=min(len(pending), os.cpu_count() or 1)) as executor:
+                    results = list(executor.map(lambda item: self._document_insights(*item), pending))
+            else:
+                results = [self._document_insights(doc_id, data) for doc_id, data in pending]
+            for (doc_id, data), doc_insights in zip(pending, results):
+                data['insights'] = doc_insights
             
-            for doc_id, data in self.financial_data.items():
-                df = data['dataframe']
-                financial_cols = data['financial_columns']
-                
-                # Basic statistics
-                doc_insights = {
-                    'document': doc_id,
-                    'insights': []
-                }
-                
-                # Amount analysis
-                if 'amount' in financial_cols:
-                    for amount_col in financial_cols['amount']:
-                        amounts = df[amount_col].dropna()
-                        if len(amounts) > 0:
-                            doc_insights['insights'].extend([
-                                f"Total {amount_col}: ${amounts.sum():,.2f}",
-                                f"Average {amount_col}: ${amounts.mean():.2f}",
-                                f"Highest {amount_col}: ${amounts.max():.2f}",
-                                f"Lowest {amount_col}: ${amounts.min():.2f}",
-                                f"Number of transactions: {len(amounts)}"
-                            ])
-                
-                # Time-based analysis
-                if 'date' in financial_cols and 'amount' in financial_cols:
-                    try:
-                        date_col = financial_cols['date'][0]
-                        amount_col = financial_cols['amount'][0]
-                        
-                        df_time = df[[date_col, amount_col]].copy()
-                        df_time[date_col] = pd.to_datetime(df_time[date_col], errors='coerce')
-                        df_time = df_time.dropna()
-                        
-                        if len(df_time) > 1:
-                            df_time = df_time.sort_values(date_col)
-                            
-                            # Monthly trends
-                            monthly = df_time.groupby(df_time[date_col].dt.to_period('M'))[amount_col].sum()
-                            if len(monthly) > 1:
-                                trend = "increasing" if monthly.iloc[-1] > monthly.iloc[0] else "decreasing"
-                                doc_insights['insights'].append(f"Monthly trend: {trend}")
-                    
-                    except Exception as e:
-                        logger.warning(f"Error in time analysis: {str(e)}")
-                
-                # Category analysis
-                if 'description' in financial_cols and 'amount' in financial_cols:
-                    try:
-                        desc_col = financial_cols['description'][0]
-                        amount_col = financial_cols['amount'][0]
-                        
-                        # Auto-categorize expenses
-                        categories = df[desc_col].apply(self.categorize_expenses)
-                        category_totals = df.groupby(categories)[amount_col].sum().sort_values(ascending=False)
-                        
-                        doc_insights['insights'].append("Top expense categories:")
-                        for cat, total in category_totals.head(5).items():
-                            doc_insights['insights'].append(f"  • {cat.title()}: ${total:,.2f}")
-                    
-                    except Exception as e:
-                        logger.warning(f"Error in category analysis: {str(e)}")
-                
-                insights.append(doc_insights)
+            insights = [data['insights'] for data in self.financial_data.values()]
             
             return {
                 'message': f"Analysis complete for {len(self.financial_data)} financial documents",
@@ -219,18 +387,17 @@ class BusinessAnalyzer:
             context_parts = []
             
             for doc_id, data in self.financial_data.items():
-                df = data['dataframe']
                 financial_cols = data['financial_columns']
                 
                 if 'amount' in financial_cols:
                     amount_col = financial_cols['amount'][0]
-                    amounts = df[amount_col].dropna()
+                    summary = self._amount_summary_for(data, amount_col)
                     
                     context_parts.append(
                         f"Financial data from {doc_id}: "
-                        f"${amounts.sum():,.2f} total, "
-                        f"{len(amounts)} transactions, "
-                        f"avg ${amounts.mean():.2f}"
+                        f"${summary['sum']:,.2f} total, "
+                        f"{summary['count']} transactions, "
+                        f"avg ${summary['mean']:.2f}"
                     )
             
             return "Business Context: " + "; ".join(context_parts)
@@ -246,7 +413,7 @@ class BusinessAnalyzer:
                 return {'error': 'Document not found'}
             
             data = self.financial_data[document_id]
-            df = data['dataframe']
+            df = self._get_dataframe(data)
             financial_cols = data['financial_columns']
             
             if 'date' not in financial_cols or 'amount' not in financial_cols:
@@ -255,41 +422,47 @@ class BusinessAnalyzer:
             date_col = financial_cols['date'][0]
             amount_col = financial_cols['amount'][0]
             
-            # Prepare time series data
-            df_forecast = df[[date_col, amount_col]].copy()
-            df_forecast[date_col] = pd.to_datetime(df_forecast[date_col], errors='coerce')
-            df_forecast = df_forecast.dropna().sort_values(date_col)
+            # Prepare time series data: order the valid amounts by date without copying the frame
+            dates = self._parse_dates(data, df, date_col)
+            amounts = df[amount_col]
+            valid = (dates.notna() & amounts.notna()).to_numpy(dtype=bool)
             
-            if len(df_forecast) < 3:
+            n = int(valid.sum())
+            if n < 3:
                 return {'error': 'Insufficient data for forecasting (need at least 3 data points)'}
             
-            # Simple linear trend forecast
-            df_forecast['period'] = range(len(df_forecast))
+            order = np.argsort(dates.to_numpy()[valid], kind='stable')
+            y = amounts.to_numpy(dtype=np.float64, na_value=np.nan)[valid][order]
             
-            # Calculate trend
-            x = df_forecast['period'].values
-            y = df_forecast[amount_col].values
+            # Simple linear trend forecast over period indices 0..n-1
+            x = np.arange(n, dtype=np.float64)
             
-            # Linear regression
-            slope = np.polyfit(x, y, 1)[0]
-            intercept = np.polyfit(x, y, 1)[1]
+            # Closed-form least squares from the sums, instead of repeated polyfit/corrcoef passes
+            sx, sy = x.sum(), y.sum()
+            sxx, sxy, syy = x @ x, x @ y, y @ y
+            x_spread = n * sxx - sx * sx
+            y_spread = n * syy - sy * sy
+            covariance = n * sxy - sx * sy
+            slope = covariance / x_spread
+            intercept = (sy - slope * sx) / n
+            r_squared = covariance ** 2 / (x_spread * y_spread) if y_spread > 0 else 0.0
             
-            # Generate forecast
-            last_period = len(df_forecast) - 1
-            forecast_periods = range(last_period + 1, last_period + 1 + periods)
-            forecast_values = [slope * p + intercept for p in forecast_periods]
+            # Generate forecast as a single array, converted to Python floats once
+            last_period = n - 1
+            forecast_periods = np.arange(last_period + 1, last_period + 1 + periods, dtype=np.float64)
+            forecast_values = (slope * forecast_periods + intercept).tolist()
             
             # Calculate confidence based on historical variance
             historical_variance = np.var(y)
             confidence_interval = np.sqrt(historical_variance) * 1.96  # 95% confidence
             
             return {
-                'forecast_values': forecast_values,
-                'periods': periods,
+                'periods': int(periods),
                 'trend': 'increasing' if slope > 0 else 'decreasing',
-                'slope': slope,
-                'confidence_interval': confidence_interval,
-                'r_squared': np.corrcoef(x, y)[0, 1] ** 2 if len(x) > 1 else 0
+                'slope': float(slope),
+                'confidence_interval': float(confidence_interval),
+                'r_squared': float(r_squared),
+                'forecast_values': forecast_values
             }
             
         except Exception as e:
@@ -303,7 +476,7 @@ class BusinessAnalyzer:
                 'documents_loaded': len(self.financial_data),
                 'document_types': [data['type'] for data in self.financial_data.values()],
                 'total_records': sum(
-                    len(data['dataframe']) 
+                    len(self._get_dataframe(data)) 
                     for data in self.financial_data.values()
                 ),
                 'categories_available': list(self.expense_categories.keys())
@@ -0,0 +1,34 @@
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+def read_csv(source, **kwargs) -> pd.DataFrame:
+    """Read a CSV with the multithreaded PyArrow parser, falling back to the C engine"""
+    try:
+        return pd.read_csv(source, engine='pyarrow', **kwargs)
+    except (ImportError, ValueError) as e:
+        logger.debug(f"PyArrow CSV engine unavailable, using default parser: {str(e)}")
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return pd.read_csv(source, **kwargs)
+
+def read_excel(source, **kwargs):
+    """Read an Excel workbook with calamine, falling back to openpyxl"""
+    try:
+        return pd.read_excel(source, engine='calamine', **kwargs)
+    except (ImportError, ValueError) as e:
+        logger.debug(f"Calamine Excel engine unavailable, using openpyxl: {str(e)}")
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return pd.read_excel(source, engine='openpyxl', **kwargs)
+
+def open_excel(source) -> pd.ExcelFile:
+    """Open an Excel workbook without parsing its sheets, preferring calamine over openpyxl"""
+    try:
+        return pd.ExcelFile(source, engine='calamine')
+    except (ImportError, ValueError) as e:
+        logger.debug(f"Calamine Excel engine unavailable, using openpyxl: {str(e)}")
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return pd.ExcelFile(source, engine='openpyxl')
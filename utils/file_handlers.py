@@ -1,25 +1,59 @@
+import io
+import json
 import os
+import re
 import shutil
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import mimetypes
 import logging
+import time
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Compiled once rather than looked up in re's cache on every upload and file lookup
+UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^\w\s.-]')
+FILENAME_SEPARATORS_RE = re.compile(r'[\s_]+')
+
+# Bytes moved per copy call when saving uploads
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Content-digest index of processed uploads, kept in the upload folder by the standalone app
+UPLOAD_INDEX_NAME = "_index.json"
+
+def _copy_upload(source, destination: Path) -> None:
+    """Write an upload stream to disk, copying kernel-side when it is backed by a real file"""
+    with open(destination, "wb") as buffer:
+        if hasattr(os, 'copy_file_range') and not isinstance(source, io.BytesIO):
+            try:
+                # On a SpooledTemporaryFile (FastAPI's UploadFile.file) fileno() rolls
+                # an in-memory spool over to a real file first
+                src_fd = source.fileno()
+                offset = source.tell()
+                while True:
+                    copied = os.copy_file_range(src_fd, buffer.fileno(), UPLOAD_BUFFER_SIZE, offset)
+                    if not copied:
+                        return
+                    offset += copied
+            except (OSError, AttributeError, io.UnsupportedOperation) as e:
+                # Unsupported source or filesystem; start over with a userspace copy
+                logger.debug(f"copy_file_range unavailable, copying upload in Python: {str(e)}")
+                buffer.seek(0)
+                buffer.truncate()
+        
+        shutil.copyfileobj(source, buffer, length=UPLOAD_BUFFER_SIZE)
+
 def secure_filename(filename: str) -> str:
     """Make a filename safe for use on the filesystem"""
-    import re
-    
     # Remove path separators
     filename = os.path.basename(filename)
     
     # Replace unsafe characters with underscores
-    filename = re.sub(r'[^\w\s.-]', '_', filename)
+    filename = UNSAFE_FILENAME_CHARS_RE.sub('_', filename)
     
     # Remove multiple spaces and underscores
-    filename = re.sub(r'[\s_]+', '_', filename)
+    filename = FILENAME_SEPARATORS_RE.sub('_', filename)
     
     # Remove leading/trailing dots and underscores
     filename = filename.strip('._')
@@ -38,6 +72,11 @@ class FileHandler:
         self.upload_folder.mkdir(parents=True, exist_ok=True)
         self.allowed_extensions = settings.ALLOWED_EXTENSIONS
         self.max_file_size = settings.MAX_FILE_SIZE
+        # MIME types of the allowed extensions, looked up once instead of per listed file
+        self._mime_types = {
+            extension: mimetypes.guess_type(f"file.{extension}")[0]
+            for extension in self.allowed_extensions
+        }
     
     def is_allowed_file(self, filename: str) -> bool:
         """Check if file extension is allowed"""
@@ -93,8 +132,7 @@ class FileHandler:
                 counter += 1
             
             # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            _copy_upload(file.file, file_path)
             
             # Get file info
             file_info = self.get_file_info(str(file_path))
@@ -120,36 +158,49 @@ class FileHandler:
         try:
             file_path = Path(file_path)
             
-            if not file_path.exists():
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
                 return {'error': 'File not found'}
             
-            stat = file_path.stat()
-            
-            return {
-                'filename': file_path.name,
-                'size': stat.st_size,
-                'size_human': self._format_file_size(stat.st_size),
-                'extension': file_path.suffix.lower().lstrip('.'),
-                'mime_type': mimetypes.guess_type(str(file_path))[0],
-                'created': stat.st_ctime,
-                'modified': stat.st_mtime,
-                'path': str(file_path)
-            }
+            return self._build_file_info(file_path, stat)
             
         except Exception as e:
             logger.error(f"Error getting file info: {str(e)}")
             return {'error': str(e)}
     
+    def _build_file_info(self, file_path: Path, stat: os.stat_result) -> Dict[str, Any]:
+        """Describe a file from an already-fetched stat result"""
+        extension = file_path.suffix.lower().lstrip('.')
+        if extension in self._mime_types:
+            mime_type = self._mime_types[extension]
+        else:
+            mime_type = mimetypes.guess_type(str(file_path))[0]
+        
+        return {
+            'filename': file_path.name,
+            'size': stat.st_size,
+            'size_human': self._format_file_size(stat.st_size),
+            'extension': extension,
+            'mime_type': mime_type,
+            'created': stat.st_ctime,
+            'modified': stat.st_mtime,
+            'path': str(file_path)
+        }
+    
     def list_uploaded_files(self) -> List[Dict[str, Any]]:
         """List all files in the upload directory"""
         try:
             files = []
             
-            for file_path in self.upload_folder.iterdir():
-                if file_path.is_file():
-                    file_info = self.get_file_info(str(file_path))
-                    if 'error' not in file_info:
-                        files.append(file_info)
+            # scandir reports the file type without a syscall, leaving one stat per file
+            with os.scandir(self.upload_folder) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name != UPLOAD_INDEX_NAME:
+                        try:
+                            files.append(self._build_file_info(Path(entry.path), entry.stat()))
+                        except OSError as e:
+                            logger.error(f"Error getting file info: {str(e)}")
             
             # Sort by modification time (newest first)
             files.sort(key=lambda x: x['modified'], reverse=True)
@@ -165,13 +216,15 @@ class FileHandler:
         try:
             file_path = self.upload_folder / secure_filename(filename)
             
-            if not file_path.exists():
+            # Unlink directly; a missing file surfaces as FileNotFoundError without a separate stat
+            try:
+                file_path.unlink()
+            except FileNotFoundError:
                 return {
                     'success': False,
                     'error': 'File not found'
                 }
-            
-            file_path.unlink()
+            self._forget_uploads({file_path.name})
             
             return {
                 'success': True,
@@ -185,6 +238,21 @@ class FileHandler:
                 'error': str(e)
             }
     
+    def _forget_uploads(self, filenames: set) -> None:
+        """Drop upload index entries of deleted files, so uploading their content again is processed anew"""
+        index_path = self.upload_folder / UPLOAD_INDEX_NAME
+        try:
+            index = json.loads(index_path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return
+        
+        kept = {digest: entry for digest, entry in index.items() if entry.get('filename') not in filenames}
+        if len(kept) != len(index):
+            # Write via a temporary file so readers never see a partial index
+            tmp_path = index_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(kept, indent=2), encoding='utf-8')
+            os.replace(tmp_path, index_path)
+    
     def get_file_path(self, filename: str) -> Optional[str]:
         """Get the full path to an uploaded file"""
         try:
@@ -200,22 +268,35 @@ class FileHandler:
     def cleanup_old_files(self, days_old: int = 30) -> Dict[str, Any]:
         """Clean up files older than specified days"""
         try:
-            import time
-            
             current_time = time.time()
             cutoff_time = current_time - (days_old * 24 * 60 * 60)
             
             deleted_files = []
             errors = []
             
-            for file_path in self.upload_folder.iterdir():
-                if file_path.is_file():
-                    try:
-                        if file_path.stat().st_mtime < cutoff_time:
-                            file_path.unlink()
-                            deleted_files.append(file_path.name)
-                    except Exception as e:
-                        errors.append(f"Error deleting {file_path.name}: {str(e)}")
+            # lstat only: symlinks are judged (and removed) as links, never followed
+            with os.scandir(self.upload_folder) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False) and entry.name != UPLOAD_INDEX_NAME:
+                        try:
+                            if entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                                os.unlink(entry.path)
+                                deleted_files.append(entry.name)
+                        except Exception as e:
+                            errors.append(f"Error deleting {entry.name}: {str(e)}")
+            if deleted_files:
+                self._forget_uploads(set(deleted_files))
+            
+            # Evict Parquet caches of parsed spreadsheets on the same schedule
+            cache_folder = Path(settings.ANALYSIS_CACHE_FOLDER)
+            if cache_folder.is_dir():
+                with os.scandir(cache_folder) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                                os.unlink(entry.path)
+                        except OSError as e:
+                            errors.append(f"Error deleting cache {entry.name}: {str(e)}")
             
             return {
                 'success': True,
@@ -237,10 +318,9 @@ class FileHandler:
             return "0 B"
         
         size_names = ["B", "KB", "MB", "GB", "TB"]
-        import math
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
+        # Each unit is 2**10 of the previous one, so the bit length gives the unit index
+        i = min((size_bytes.bit_length() - 1) // 10, len(size_names) - 1)
+        s = round(size_bytes / (1 << (10 * i)), 2)
         
         return f"{s} {size_names[i]}"
     
@@ -251,17 +331,18 @@ class FileHandler:
             file_count = 0
             file_types = {}
             
-            for file_path in self.upload_folder.iterdir():
-                if file_path.is_file():
-                    size = file_path.stat().st_size
-                    total_size += size
-                    file_count += 1
-                    
-                    extension = file_path.suffix.lower().lstrip('.')
-                    if extension in file_types:
-                        file_types[extension] += 1
-                    else:
-                        file_types[extension] = 1
+            with os.scandir(self.upload_folder) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name != UPLOAD_INDEX_NAME:
+                        size = entry.stat().st_size
+                        total_size += size
+                        file_count += 1
+                        
+                        extension = os.path.splitext(entry.name)[1].lower().lstrip('.')
+                        if extension in file_types:
+                            file_types[extension] += 1
+                        else:
+                            file_types[extension] = 1
             
             return {
                 'total_files': file_count,